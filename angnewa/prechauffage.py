@@ -0,0 +1,84 @@
+"""
+Préchauffage des workers gunicorn (voir gunicorn.conf.py).
+
+Dans le maître, après le chargement de l'application (preload_app) : les
+résolveurs d'URL et les gabarits sont préparés une fois, puis hérités par
+chaque worker au fork. Les connexions à la base, elles, ne doivent pas être
+partagées : elles sont ouvertes dans chaque worker, une par thread.
+"""
+import threading
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connections
+from django.template import TemplateSyntaxError, engines
+from django.template.loader import get_template
+from django.template.utils import get_app_template_dirs
+from django.urls import get_resolver
+
+
+def prechauffer_urls():
+    resolver = get_resolver()
+    # reverse_dict remplit les caches de résolution et d'inversion
+    return len(resolver.reverse_dict)
+
+
+def prechauffer_gabarits():
+    """
+    Compile les gabarits .html des répertoires du projet et des applications.
+    Le chargeur mis en cache, actif par défaut, les garde ensuite en mémoire.
+    """
+    repertoires = set(get_app_template_dirs('templates'))
+    for moteur in engines.all():
+        repertoires.update(moteur.template_dirs)
+
+    noms = {
+        chemin.relative_to(repertoire).as_posix()
+        for repertoire in repertoires
+        for chemin in Path(repertoire).rglob('*.html')
+    }
+    compiles = 0
+    for nom in sorted(noms):
+        try:
+            get_template(nom)
+        except TemplateSyntaxError:
+            continue  # sera signalé à la première utilisation réelle
+        compiles += 1
+    return compiles
+
+
+def prechauffer_maitre():
+    urls = prechauffer_urls()
+    gabarits = prechauffer_gabarits()
+    # Aucune connexion ne doit survivre au fork
+    connections.close_all()
+    return urls, gabarits
+
+
+def ouvrir_connexions():
+    for alias in settings.DATABASES:
+        connections[alias].ensure_connection()
+
+
+def prechauffer_worker(pool=None, threads=1):
+    """
+    Ouvre les connexions à la base avant la première requête. Avec gthread,
+    chaque thread du pool a ses propres connexions : on occupe tous les
+    threads en même temps (barrière) pour qu'aucun ne reste froid.
+    """
+    if pool is None or threads <= 1:
+        ouvrir_connexions()
+        return 1
+
+    barriere = threading.Barrier(threads)
+
+    def tache():
+        ouvrir_connexions()
+        try:
+            barriere.wait(timeout=5)
+        except threading.BrokenBarrierError:
+            pass
+
+    for futur in [pool.submit(tache) for _ in range(threads)]:
+        futur.result()
+    return threads
@@ -0,0 +1,18 @@
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+class TestRunner(DiscoverRunner):
+    """
+    Lanceur de tests du projet : les budgets de requêtes (core/budget.py)
+    y sont stricts, un dépassement fait échouer le test.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.reglages_tests = override_settings(BUDGET_REQUETES_STRICT=True)
+        self.reglages_tests.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.reglages_tests.disable()
+        super().teardown_test_environment(**kwargs)
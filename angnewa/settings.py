@@ -72,6 +72,10 @@ else:
         }
     }
 
+# Connexions persistantes : ouvertes au préchauffage des workers puis réutilisées
+DATABASES['default']['CONN_MAX_AGE'] = env.int('CONN_MAX_AGE', default=60)
+DATABASES['default']['CONN_HEALTH_CHECKS'] = True
+
 
 # Validation des mots de passe
 AUTH_PASSWORD_VALIDATORS = [
@@ -96,6 +100,46 @@ STATIC_ROOT = BASE_DIR / "staticfiles"  # Ajouté pour Render ou production
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Notifications chauffeur : résumé groupé des réservations
+NOTIFICATIONS_RESUME = env.bool('NOTIFICATIONS_RESUME', default=False)
+NOTIFICATIONS_FENETRE = env.int('NOTIFICATIONS_FENETRE', default=600)  # secondes
+NOTIFICATIONS_DELAI_URGENT = env.int('NOTIFICATIONS_DELAI_URGENT', default=7200)  # secondes avant départ
+
+# Caches : « default » reste local au processus (pages partagées, cartes de
+# trajet) ; « partage » est commun à tous les workers et aux commandes et porte
+# les versions des trajets (core/coalescence.py). Par défaut, des fichiers
+# partagés par les processus d'une même machine ; sur plusieurs machines,
+# CACHE_PARTAGE_URL=redis://… ou pymemcache://…. Pas de DatabaseCache : une
+# requête de plus sur la base à chaque GET (avertissement core.W001).
+CACHES = {
+    'default': env.cache_url('CACHE_URL', default='locmemcache://'),
+    'partage': env.cache_url(
+        'CACHE_PARTAGE_URL', default=f'filecache://{BASE_DIR / "cache_partage"}?max_entries=100000'
+    ),
+}
+
+# Durée (secondes) de partage d'une page de réservation entre requêtes concurrentes
+RESERVATION_CACHE_TTL = env.int('RESERVATION_CACHE_TTL', default=5)
+
+# Durée (secondes) du cache des cartes de trajet ; 0 pour le désactiver
+CARTES_CACHE_TTL = env.int('CARTES_CACHE_TTL', default=3600)
+
+# Budget de requêtes SQL (core/budget.py) : lever une erreur au lieu de journaliser.
+# Toujours strict sous manage.py test (angnewa.runner.TestRunner)
+BUDGET_REQUETES_STRICT = env.bool('BUDGET_REQUETES_STRICT', default=DEBUG)
+TEST_RUNNER = 'angnewa.runner.TestRunner'
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'core': {'handlers': ['console'], 'level': 'WARNING'},
+    },
+}
+
 # Modèle utilisateur personnalisé
 AUTH_USER_MODEL = 'core.Utilisateur'
 
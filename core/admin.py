@@ -1,6 +1,121 @@
-from django.contrib import admin
-from .models import Utilisateur, Trajet, Reservation
+from django.contrib import admin, messages
+from django.core.paginator import Paginator
+from django.db import connection, transaction
+from django.db.models import Count
+from django.utils import timezone
+from django.utils.functional import cached_property
+from .archivage import archiver
+from .coalescence import invalider_trajet
+from .models import Utilisateur, Trajet, Reservation, StatistiqueTrajet
+from .places import recalculer_places
 
-admin.site.register(Utilisateur)
-admin.site.register(Trajet)
-admin.site.register(Reservation)
+
+# ----------- Pagination à comptage estimé (PostgreSQL) -----------
+class ComptageEstimePaginator(Paginator):
+    """
+    Sans filtre, PostgreSQL fournit une estimation du nombre de lignes via
+    pg_class.reltuples (partitions comprises) au lieu d'un COUNT(*) complet.
+    Les petites tables et les listes filtrées gardent le comptage exact.
+    """
+    SEUIL_ESTIMATION = 10000
+
+    @cached_property
+    def count(self):
+        requete = getattr(self.object_list, 'query', None)
+        if connection.vendor != 'postgresql' or requete is None or requete.where:
+            return super().count
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT COALESCE(SUM(GREATEST(reltuples, 0)), 0)::bigint FROM pg_class "
+                "WHERE oid = %s::regclass "
+                "OR oid IN (SELECT inhrelid FROM pg_inherits WHERE inhparent = %s::regclass)",
+                [requete.model._meta.db_table] * 2,
+            )
+            estimation = cursor.fetchone()[0]
+        if estimation < self.SEUIL_ESTIMATION:
+            return super().count
+        return estimation
+
+
+class AdminRapide(admin.ModelAdmin):
+    paginator = ComptageEstimePaginator
+    show_full_result_count = False
+    list_per_page = 50
+
+    def supprimer(self, queryset):
+        total, _ = queryset.delete()
+        return total
+
+    @admin.action(description="Supprimer en masse (sans confirmation par objet)", permissions=['delete'])
+    def supprimer_en_masse(self, request, queryset):
+        total = self.supprimer(queryset)
+        self.message_user(request, f"{total} lignes supprimées.", messages.SUCCESS)
+
+
+@admin.register(Utilisateur)
+class UtilisateurAdmin(admin.ModelAdmin):
+    list_display = ('telephone', 'nom', 'prenom', 'email', 'code_unique', 'is_active')
+    search_fields = ('=telephone', '=code_unique')
+    show_full_result_count = False
+
+
+@admin.register(Trajet)
+class TrajetAdmin(AdminRapide):
+    list_display = ('ville_depart', 'ville_arrivee', 'date_heure_depart', 'conducteur',
+                    'places_disponibles', 'places_totales', 'prix', 'type_vehicule')
+    list_select_related = ('conducteur',)
+    list_filter = ('type_vehicule', 'date_heure_depart')
+    search_fields = ('=conducteur__telephone',)
+    raw_id_fields = ('conducteur',)
+    ordering = ('-date_heure_depart',)
+    actions = ['archiver_en_masse', 'supprimer_en_masse']
+
+    @admin.action(description="Archiver les trajets terminés sélectionnés", permissions=['delete'])
+    def archiver_en_masse(self, request, queryset):
+        trajets = list(
+            queryset.filter(date_heure_depart__lt=timezone.now())
+            .annotate(nombre_reservations=Count('reservations'))
+        )
+        archives = archiver(trajets) if trajets else 0
+        self.message_user(request, f"{archives} trajets archivés (les trajets à venir sont ignorés).", messages.SUCCESS)
+
+
+@admin.register(Reservation)
+class ReservationAdmin(AdminRapide):
+    list_display = ('nom', 'telephone', 'trajet', 'date_reservation', 'notifiee')
+    list_select_related = ('trajet',)
+    list_filter = ('notifiee',)
+    search_fields = ('=telephone',)
+    raw_id_fields = ('trajet',)
+    ordering = ('-date_reservation',)
+    actions = ['supprimer_en_masse']
+
+    def supprimer(self, queryset):
+        """Supprime les réservations et rend leurs places aux trajets."""
+        with transaction.atomic():
+            trajet_ids = list(queryset.order_by().values_list('trajet_id', flat=True).distinct())
+            total, _ = queryset.delete()
+            recalculer_places(trajet_ids)
+        for trajet_id in trajet_ids:
+            invalider_trajet(trajet_id)
+        return total
+
+    # Suppression unitaire et action « delete_selected » de Django
+    def delete_model(self, request, obj):
+        self.supprimer(Reservation.objects.filter(pk=obj.pk))
+
+    def delete_queryset(self, request, queryset):
+        self.supprimer(queryset)
+
+
+@admin.register(StatistiqueTrajet)
+class StatistiqueTrajetAdmin(AdminRapide):
+    list_display = ('chauffeur', 'ville_depart', 'ville_arrivee', 'date_heure_depart',
+                    'places_totales', 'places_reservees', 'statut')
+    list_select_related = ('chauffeur',)
+    list_filter = ('statut', 'date_heure_depart')
+    search_fields = ('=chauffeur__telephone',)
+    raw_id_fields = ('chauffeur',)
+    ordering = ('-date_heure_depart',)
+    actions = ['supprimer_en_masse']
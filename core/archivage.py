@@ -0,0 +1,196 @@
+import logging
+import os
+import socket
+import threading
+from datetime import timedelta
+
+from django.db import IntegrityError, close_old_connections, transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .budget import budget_requetes
+from .models import Trajet, StatistiqueTrajet, EtatTache
+from .partitions import assurer_partitions_a_venir, partitionnement_disponible, supprimer_partitions_expirees
+
+TACHE_ARCHIVAGE = 'archiver_trajets'
+RETENTION_STATISTIQUES = timedelta(days=240)
+DUREE_VERROU = timedelta(minutes=5)
+
+logger = logging.getLogger('core.archivage')
+
+
+def identifiant_worker():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+# ----------- Verrou à bail (une ligne EtatTache par tâche) -----------
+def acquerir_verrou(nom, proprietaire, duree=DUREE_VERROU):
+    """
+    Prend (ou renouvelle) le verrou de la tâche en un seul UPDATE conditionnel,
+    sûr entre plusieurs processus. Retourne True si le verrou est détenu.
+    """
+    maintenant = timezone.now()
+    try:
+        EtatTache.objects.get_or_create(nom=nom)
+    except IntegrityError:
+        pass  # créée en parallèle par un autre worker
+
+    libre = Q(verrou_expire__isnull=True) | Q(verrou_expire__lt=maintenant) | Q(verrou_proprietaire=proprietaire)
+    pris = EtatTache.objects.filter(libre, nom=nom).update(
+        verrou_proprietaire=proprietaire,
+        verrou_expire=maintenant + duree,
+    )
+    return pris == 1
+
+
+def liberer_verrou(nom, proprietaire):
+    EtatTache.objects.filter(nom=nom, verrou_proprietaire=proprietaire).update(
+        verrou_proprietaire='',
+        verrou_expire=None,
+    )
+
+
+# ----------- Archivage par lots -----------
+def archiver(trajets):
+    """
+    Copie les trajets (annotés avec nombre_reservations) dans StatistiqueTrajet
+    en un seul INSERT, puis les supprime en une seule requête.
+    """
+    statistiques = []
+    for trajet in trajets:
+        # Nombre réel de réservations, indépendant du compteur places_disponibles
+        places_reservees = trajet.nombre_reservations
+        statistiques.append(StatistiqueTrajet(
+            chauffeur_id=trajet.conducteur_id,
+            ville_depart=trajet.ville_depart,
+            ville_arrivee=trajet.ville_arrivee,
+            date_heure_depart=trajet.date_heure_depart,
+            places_totales=trajet.places_totales,
+            places_reservees=places_reservees,
+            statut='avec_reservation' if places_reservees > 0 else 'sans_reservation',
+        ))
+    with transaction.atomic():
+        StatistiqueTrajet.objects.bulk_create(statistiques)
+        Trajet.objects.filter(id__in=[trajet.id for trajet in trajets]).delete()
+    return len(statistiques)
+
+
+def archiver_lot(maintenant, taille_lot):
+    """
+    Archive au plus taille_lot trajets terminés, du plus ancien au plus récent,
+    et avance le filigrane. Retourne le nombre de trajets archivés.
+
+    Pas de borne basse sur le filigrane : un trajet publié avec une date déjà
+    passée doit aussi être archivé. trajet_depart_idx borne la lecture à
+    « < maintenant », et les trajets archivés ont quitté la table.
+    """
+    # Les budgets couvrent les requêtes à coût fixe, à l'intérieur de la
+    # transaction : un dépassement en mode strict annule le lot au lieu de
+    # lever après coup. archiver() n'y est pas soumis, car son nombre
+    # d'INSERT/DELETE dépend de taille_lot et des paquets du SGBD.
+    with transaction.atomic():
+        with budget_requetes(5, nom='archiver_lot.selection'):
+            etat, _ = EtatTache.objects.get_or_create(nom=TACHE_ARCHIVAGE)
+
+            trajets = Trajet.objects.filter(date_heure_depart__lt=maintenant).annotate(
+                nombre_reservations=Count('reservations')
+            )
+            trajets = list(trajets.order_by('date_heure_depart', 'id')[:taille_lot])
+        if not trajets:
+            return 0
+
+        archiver(trajets)
+
+        with budget_requetes(1, nom='archiver_lot.filigrane'):
+            dernier_depart = trajets[-1].date_heure_depart
+            if etat.filigrane is None or dernier_depart > etat.filigrane:
+                EtatTache.objects.filter(pk=etat.pk).update(filigrane=dernier_depart)
+
+    return len(trajets)
+
+
+def purger_lot(maintenant, taille_lot):
+    """
+    Supprime les statistiques au-delà de la durée de rétention : d'abord les
+    partitions mensuelles entièrement expirées (PostgreSQL), puis au plus
+    taille_lot lignes restantes du mois à cheval sur la limite.
+    """
+    limite = maintenant - RETENTION_STATISTIQUES
+    supprimees = 0
+    if partitionnement_disponible():
+        supprimees = supprimer_partitions_expirees(limite)
+
+    # Hors budget : la purge des partitions coûte 3 requêtes par partition expirée
+    with transaction.atomic(), budget_requetes(2, nom='purger_lot'):
+        ids = list(
+            StatistiqueTrajet.objects.filter(date_heure_depart__lt=limite)
+            .order_by('date_heure_depart')
+            .values_list('id', flat=True)[:taille_lot]
+        )
+        if ids:
+            StatistiqueTrajet.objects.filter(id__in=ids).delete()
+    return supprimees + len(ids)
+
+
+def executer_cycle(proprietaire, taille_lot):
+    """
+    Un cycle de l'ordonnanceur : un lot d'archivage et un lot de purge, si le
+    verrou est obtenu. Retourne (archivés, purgés), ou None sans le verrou.
+    """
+    if not acquerir_verrou(TACHE_ARCHIVAGE, proprietaire):
+        return None
+    maintenant = timezone.now()
+    if partitionnement_disponible():
+        assurer_partitions_a_venir(maintenant)
+    return archiver_lot(maintenant, taille_lot), purger_lot(maintenant, taille_lot)
+
+
+def boucle_archivage(taille_lot=200, intervalle=60, arret=None):
+    """
+    Archive en continu : enchaîne les lots tant qu'il reste du travail, puis
+    attend `intervalle` secondes. S'arrête quand l'évènement `arret` est levé.
+    Une erreur dans un cycle est journalisée et n'arrête pas la boucle.
+    """
+    arret = arret or threading.Event()
+    proprietaire = identifiant_worker()
+    try:
+        while not arret.is_set():
+            close_old_connections()
+            try:
+                resultat = executer_cycle(proprietaire, taille_lot)
+            except Exception:
+                logger.exception("cycle d'archivage en échec")
+                resultat = None
+            if resultat is None or resultat == (0, 0):
+                arret.wait(intervalle)
+    finally:
+        liberer_verrou(TACHE_ARCHIVAGE, proprietaire)
+        close_old_connections()
+
+
+def lancer_en_arriere_plan(taille_lot=200, intervalle=60):
+    """
+    Démarre la boucle d'archivage dans un thread démon du processus courant.
+    Retourne (arret, thread) pour pouvoir l'arrêter, voir arreter_en_arriere_plan.
+    """
+    arret = threading.Event()
+    thread = threading.Thread(
+        target=boucle_archivage,
+        kwargs={'taille_lot': taille_lot, 'intervalle': intervalle, 'arret': arret},
+        name='archivage-trajets',
+        daemon=True,
+    )
+    thread.start()
+    return arret, thread
+
+
+def arreter_en_arriere_plan(arret, thread, delai=10):
+    """
+    Arrête la boucle lancée par lancer_en_arriere_plan et rend le verrou tout
+    de suite, sans attendre l'expiration du bail (DUREE_VERROU).
+    """
+    arret.set()
+    thread.join(delai)
+    # Si le cycle en cours dépasse `delai`, le verrou est rendu quand même :
+    # la boucle s'arrêtera à la fin du cycle sans le reprendre
+    liberer_verrou(TACHE_ARCHIVAGE, identifiant_worker())
@@ -0,0 +1,121 @@
+"""
+Budget de requêtes SQL pour les vues et les tâches.
+
+    @budget_requetes(4)
+    def ma_vue(request): ...
+
+    with budget_requetes(2, nom='archiver_lot'):
+        ...
+
+Avec BUDGET_REQUETES_STRICT (par défaut en DEBUG, toujours sous
+manage.py test), un dépassement lève BudgetRequetesDepasse. Sinon, il est
+journalisé (logger « core.budget ») avec les requêtes répétées, signe d'un N+1.
+
+Les requêtes d'un cache DatabaseCache sont comptées comme les autres, mais
+pas les instructions de transaction (BEGIN, SAVEPOINT…) que ses écritures
+ouvrent autour d'elles.
+"""
+import json
+import logging
+from collections import Counter
+from contextlib import ContextDecorator
+
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger('core.budget')
+
+OUVERTURES_TRANSACTION = ('BEGIN', 'SAVEPOINT')
+FERMETURES_TRANSACTION = ('RELEASE SAVEPOINT', 'ROLLBACK', 'COMMIT')
+
+
+class BudgetRequetesDepasse(AssertionError):
+    pass
+
+
+def mode_strict():
+    return settings.BUDGET_REQUETES_STRICT
+
+
+def tables_cache():
+    return [
+        config.get('LOCATION')
+        for config in settings.CACHES.values()
+        if config['BACKEND'] == 'django.core.cache.backends.db.DatabaseCache'
+    ]
+
+
+class budget_requetes(ContextDecorator):
+    def __init__(self, maximum, nom=None):
+        self.maximum = maximum
+        self.nom = nom
+        self.requetes = []
+
+    def _recreate_cm(self):
+        # Utilisé en décorateur : un compteur neuf par appel (vues multi-threads)
+        return budget_requetes(self.maximum, self.nom)
+
+    def __call__(self, fonction):
+        self.nom = self.nom or f'{fonction.__module__}.{fonction.__qualname__}'
+        return super().__call__(fonction)
+
+    def _enregistrer(self, execute, sql, params, many, context):
+        instruction = sql.lstrip().upper()
+        if instruction.startswith(OUVERTURES_TRANSACTION):
+            # En attente : comptée seulement si la transaction ne sert pas qu'au cache
+            self._ouvertures.append(sql)
+        elif instruction.startswith(FERMETURES_TRANSACTION):
+            if not self._apres_cache:
+                self.requetes.append(sql)
+        elif any(table in sql for table in self._tables_cache):
+            self._ouvertures = []
+            self._apres_cache = True
+            self.requetes.append(sql)
+        else:
+            self.requetes.extend(self._ouvertures)
+            self._ouvertures = []
+            self._apres_cache = False
+            self.requetes.append(sql)
+        return execute(sql, params, many, context)
+
+    def __enter__(self):
+        self.requetes = []
+        self._ouvertures = []
+        self._apres_cache = False
+        self._tables_cache = tables_cache()
+        self._enveloppe = connection.execute_wrapper(self._enregistrer)
+        self._enveloppe.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._enveloppe.__exit__(exc_type, exc_value, traceback)
+        self.requetes.extend(self._ouvertures)
+        if exc_type is None and len(self.requetes) > self.maximum:
+            self.signaler()
+        return False
+
+    def rapport(self):
+        repetees = [
+            {'sql': sql, 'nombre': nombre}
+            for sql, nombre in Counter(self.requetes).most_common()
+            if nombre > 1
+        ]
+        return {
+            'nom': self.nom,
+            'budget': self.maximum,
+            'requetes': len(self.requetes),
+            'requetes_repetees': repetees,
+        }
+
+    def signaler(self):
+        rapport = self.rapport()
+        if mode_strict():
+            raise BudgetRequetesDepasse(
+                f"{rapport['nom']} : {rapport['requetes']} requêtes pour un budget de {rapport['budget']}.\n"
+                + json.dumps(rapport['requetes_repetees'], ensure_ascii=False, indent=2)
+            )
+        logger.warning(
+            "budget_requetes_depasse %s",
+            json.dumps(rapport, ensure_ascii=False),
+            extra={'budget_requetes': rapport},
+        )
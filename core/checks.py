@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.core.checks import Warning, register
+
+from .coalescence import CACHE_VERSIONS
+
+
+@register()
+def verifier_cache_partage(app_configs, **kwargs):
+    """Le cache des versions ne doit pas coûter une requête SQL par GET."""
+    backend = settings.CACHES.get(CACHE_VERSIONS, {}).get('BACKEND', '')
+    if backend != 'django.core.cache.backends.db.DatabaseCache':
+        return []
+    return [Warning(
+        f"Le cache « {CACHE_VERSIONS} » utilise DatabaseCache : chaque page de réservation "
+        "fait une requête de plus sur la base pour lire la version du trajet.",
+        hint="Utiliser un cache fichier, Redis ou Memcached (CACHE_PARTAGE_URL).",
+        id='core.W001',
+    )]
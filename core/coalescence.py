@@ -0,0 +1,62 @@
+"""
+Coalescence des GET concurrents (« single-flight ») sur les pages chaudes.
+
+Les requêtes identiques qui arrivent en même temps attendent le même calcul
+au lieu de refaire chacune la lecture en base et le rendu. Le résultat est
+gardé quelques secondes dans le cache Django, sous une clé versionnée : il
+suffit d'incrémenter la version d'un trajet pour invalider immédiatement
+toutes ses entrées, y compris un calcul encore en cours.
+
+Le verrou et les pages calculées sont locaux au processus (threads gthread).
+Les versions vivent dans le cache « partage » (settings.CACHES) : une
+invalidation faite par un worker ou par une commande (reconcilier_places)
+vaut pour tous les workers.
+"""
+import threading
+import uuid
+import zlib
+
+from django.core.cache import cache, caches
+
+CACHE_VERSIONS = 'partage'
+
+NOMBRE_VERROUS = 64
+_verrous = [threading.Lock() for _ in range(NOMBRE_VERROUS)]
+
+
+def _verrou(cle):
+    # Verrous par bandes : mémoire bornée quel que soit le nombre de trajets
+    return _verrous[zlib.crc32(cle.encode()) % NOMBRE_VERROUS]
+
+
+def _cle_version(trajet_id):
+    return f'trajet:{trajet_id}:version'
+
+
+def version_trajet(trajet_id):
+    return caches[CACHE_VERSIONS].get_or_set(_cle_version(trajet_id), 0, None)
+
+
+def invalider_trajet(trajet_id):
+    """À appeler dès que le trajet (notamment ses places) change."""
+    # Une version unique plutôt qu'un incr : sur un cache fichier, incr lit puis
+    # écrit, et deux invalidations simultanées donneraient la même version
+    caches[CACHE_VERSIONS].set(_cle_version(trajet_id), uuid.uuid4().hex, None)
+
+
+def calcul_unique(cle, calculer, ttl):
+    """
+    Retourne la valeur en cache pour `cle`, ou la calcule une seule fois pour
+    toutes les requêtes concurrentes qui la demandent.
+    """
+    valeur = cache.get(cle)
+    if valeur is not None:
+        return valeur
+
+    with _verrou(cle):
+        # Un autre thread a pu remplir le cache pendant l'attente
+        valeur = cache.get(cle)
+        if valeur is None:
+            valeur = calculer()
+            cache.set(cle, valeur, ttl)
+    return valeur
@@ -0,0 +1,78 @@
+from django.db.models import Q
+
+from .models import Trajet
+
+
+class RechercheNonIndexable(Exception):
+    """Combinaison de filtres qu'aucun index de Trajet ne peut servir."""
+
+
+# Formes de requête servies par un index (voir Trajet.Meta.indexes).
+# Chaque forme est : (colonnes d'égalité, colonne de plage/tri).
+FORMES_INDEXEES = {
+    'trajet_depart_idx': ((), 'date_heure_depart'),
+    'trajet_type_depart_idx': (('type_vehicule',), 'date_heure_depart'),
+    'trajet_prix_depart_idx': ((), 'prix'),
+}
+
+TRIS = {
+    'depart': ('date_heure_depart', 'id'),
+    'prix': ('prix', 'date_heure_depart', 'id'),
+    '-prix': ('-prix', 'date_heure_depart', 'id'),
+}
+
+
+def choisir_index(egalites, plages):
+    """Retourne le nom de l'index qui sert la forme demandée, ou None."""
+    for nom, (colonnes_egalite, colonne_plage) in FORMES_INDEXEES.items():
+        if set(colonnes_egalite) <= egalites and colonne_plage in plages:
+            return nom
+    return None
+
+
+def composer_recherche(criteres, maintenant):
+    """
+    Construit une seule requête Trajet à partir des critères validés par
+    RechercheTrajetForm. Les trajets passés sont masqués par défaut.
+    Lève RechercheNonIndexable si aucun index ne borne la requête.
+    """
+    conditions = Q()
+    egalites = set()
+    plages = set()
+
+    date_min = criteres.get('date_min')
+    if not criteres.get('inclure_passes'):
+        date_min = max(date_min, maintenant) if date_min else maintenant
+    if date_min:
+        conditions &= Q(date_heure_depart__gte=date_min)
+        plages.add('date_heure_depart')
+    if criteres.get('date_max'):
+        conditions &= Q(date_heure_depart__lte=criteres['date_max'])
+        plages.add('date_heure_depart')
+
+    if criteres.get('prix_max') is not None:
+        conditions &= Q(prix__lte=criteres['prix_max'])
+        plages.add('prix')
+    if criteres.get('type_vehicule'):
+        conditions &= Q(type_vehicule=criteres['type_vehicule'])
+        egalites.add('type_vehicule')
+    if criteres.get('places_min'):
+        conditions &= Q(places_disponibles__gte=criteres['places_min'])
+
+    # Filtres résiduels : appliqués sur les lignes déjà bornées par l'index
+    if criteres.get('ville_depart'):
+        conditions &= Q(ville_depart__icontains=criteres['ville_depart'])
+    if criteres.get('ville_arrivee'):
+        conditions &= Q(ville_arrivee__icontains=criteres['ville_arrivee'])
+
+    index = choisir_index(egalites, plages)
+    if index is None:
+        raise RechercheNonIndexable(
+            "Précisez une date de départ ou un prix maximum pour rechercher parmi les trajets passés."
+        )
+
+    # Borné par le seul prix, un tri par date ferait parcourir tout
+    # trajet_depart_idx (SQLite) : le tri par défaut suit alors l'index du prix
+    tri_defaut = 'prix' if index == 'trajet_prix_depart_idx' else 'depart'
+    tri = TRIS.get(criteres.get('tri') or tri_defaut, TRIS[tri_defaut])
+    return Trajet.objects.filter(conditions).order_by(*tri)
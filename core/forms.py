@@ -1,5 +1,5 @@
 from django import forms
-from .models import Utilisateur, Trajet, Reservation
+from .models import Utilisateur, Trajet, Reservation, normaliser_telephone
 
 
 
@@ -36,7 +36,53 @@ class TrajetForm(forms.ModelForm):
 
 
 
+def nettoyer_telephone(valeur):
+    telephone = normaliser_telephone(valeur)
+    if not telephone or len(telephone) > 15:
+        raise forms.ValidationError("Numéro de téléphone invalide.")
+    return telephone
+
+
 class ReservationForm(forms.ModelForm):
+    # Saisie libre (+224, espaces, tirets) : la valeur enregistrée est normalisée
+    telephone = forms.CharField(label="Téléphone", max_length=25)
+
     class Meta:
         model = Reservation
         fields = ['nom', 'telephone', 'email']
+
+    def clean_telephone(self):
+        return nettoyer_telephone(self.cleaned_data['telephone'])
+
+
+class RechercheReservationsForm(forms.Form):
+    telephone = forms.CharField(label="Numéro de téléphone", max_length=25)
+
+    def clean_telephone(self):
+        return nettoyer_telephone(self.cleaned_data['telephone'])
+
+
+class RechercheTrajetForm(forms.Form):
+    TRI_CHOICES = [
+        ('depart', 'Départ le plus proche'),
+        ('prix', 'Prix croissant'),
+        ('-prix', 'Prix décroissant'),
+    ]
+
+    ville_depart = forms.CharField(max_length=100, required=False)
+    ville_arrivee = forms.CharField(max_length=100, required=False)
+    date_min = forms.DateTimeField(required=False, widget=forms.DateTimeInput(attrs={'type': 'datetime-local'}))
+    date_max = forms.DateTimeField(required=False, widget=forms.DateTimeInput(attrs={'type': 'datetime-local'}))
+    prix_max = forms.DecimalField(max_digits=8, decimal_places=2, min_value=0, required=False)
+    type_vehicule = forms.ChoiceField(choices=[('', 'Tous')] + Trajet.TYPE_VEHICULE_CHOICES, required=False)
+    places_min = forms.IntegerField(min_value=1, required=False)
+    inclure_passes = forms.BooleanField(required=False)
+    tri = forms.ChoiceField(choices=TRI_CHOICES, required=False)
+
+    def clean(self):
+        cleaned_data = super().clean()
+        date_min = cleaned_data.get('date_min')
+        date_max = cleaned_data.get('date_max')
+        if date_min and date_max and date_min > date_max:
+            raise forms.ValidationError("La date minimale doit précéder la date maximale.")
+        return cleaned_data
@@ -0,0 +1,36 @@
+"""
+Cache des cartes de trajet affichées dans les listes.
+
+Chaque carte est rendue une fois puis gardée sous une clé qui contient l'id
+du trajet et sa date_modification : toute modification du trajet change la
+clé, l'ancienne carte n'est plus jamais lue. Une page est assemblée avec un
+seul aller-retour vers le cache (get_many / set_many).
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import get_template
+from django.utils.safestring import mark_safe
+
+
+def cle_carte(gabarit, trajet):
+    return f'carte:{gabarit}:{trajet.pk}:{trajet.date_modification.timestamp()}'
+
+
+def cartes_trajets(trajets, gabarit):
+    """Retourne le HTML de la carte de chaque trajet, dans l'ordre de `trajets`."""
+    template = get_template(gabarit)
+    if not settings.CARTES_CACHE_TTL:
+        return [mark_safe(template.render({'trajet': trajet})) for trajet in trajets]
+
+    cles = [cle_carte(gabarit, trajet) for trajet in trajets]
+    trouvees = cache.get_many(cles)
+    manquantes = {}
+    cartes = []
+    for cle, trajet in zip(cles, trajets):
+        if cle not in trouvees:
+            manquantes[cle] = template.render({'trajet': trajet})
+        cartes.append(mark_safe(trouvees.get(cle) or manquantes[cle]))
+
+    if manquantes:
+        cache.set_many(manquantes, settings.CARTES_CACHE_TTL)
+    return cartes
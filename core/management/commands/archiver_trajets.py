@@ -1,42 +1,74 @@
+import signal
+import threading
+
 from django.core.management.base import BaseCommand
 from django.utils import timezone
-from core.models import Trajet, StatistiqueTrajet
-from datetime import timedelta
+from core.archivage import (
+    TACHE_ARCHIVAGE,
+    acquerir_verrou,
+    archiver_lot,
+    boucle_archivage,
+    identifiant_worker,
+    liberer_verrou,
+    purger_lot,
+)
+
+VERROU_PERDU = "Verrou d'archivage perdu (bail expiré, repris par un autre processus) : arrêt."
 
 class Command(BaseCommand):
     help = "Archive tous les trajets terminés (date de départ dépassée), et supprime ceux archivés depuis plus de 8 mois."
 
+    def add_arguments(self, parser):
+        parser.add_argument('--continu', action='store_true',
+                            help="Mode ordonnanceur : archive en continu par petits lots.")
+        parser.add_argument('--lot', type=int, default=200,
+                            help="Nombre maximal de lignes traitées par lot.")
+        parser.add_argument('--intervalle', type=int, default=60,
+                            help="Pause (secondes) entre deux cycles sans travail en mode continu.")
+
     def handle(self, *args, **options):
-        maintenant = timezone.now()
-
-        # 1. ARCHIVER les trajets dont la date de départ est déjà passée
-        trajets_termines = Trajet.objects.filter(date_heure_depart__lt=maintenant)
-        total_archives = 0
-
-        for trajet in trajets_termines:
-            places_reservees = max(0, trajet.places_totales - trajet.places_disponibles)
-            statut = 'avec_reservation' if places_reservees > 0 else 'sans_reservation'
-
-            # On enregistre les infos dans StatistiqueTrajet
-            StatistiqueTrajet.objects.create(
-                chauffeur=trajet.conducteur,
-                ville_depart=trajet.ville_depart,
-                ville_arrivee=trajet.ville_arrivee,
-                date_heure_depart=trajet.date_heure_depart,
-                places_totales=trajet.places_totales,
-                places_reservees=places_reservees,
-                statut=statut
-            )
-
-            trajet.delete()
-            total_archives += 1
-
-        self.stdout.write(self.style.SUCCESS(f"{total_archives} trajets archivés."))
-
-        # 2. SUPPRIMER les statistiques trop anciennes (plus de 8 mois)
-        limite_archive = maintenant - timedelta(days=240)
-        archives_supprimees = StatistiqueTrajet.objects.filter(date_heure_depart__lt=limite_archive)
-        total_supprimees = archives_supprimees.count()
-        archives_supprimees.delete()
-
-        self.stdout.write(self.style.SUCCESS(f"{total_supprimees} archives supprimées (plus de 8 mois)."))
+        taille_lot = options['lot']
+
+        if options['continu']:
+            self.stdout.write(f"Archivage continu (lots de {taille_lot}, pause {options['intervalle']}s)…")
+            arret = threading.Event()
+            for signum in (signal.SIGINT, signal.SIGTERM):
+                signal.signal(signum, lambda *_: arret.set())
+            boucle_archivage(taille_lot=taille_lot, intervalle=options['intervalle'], arret=arret)
+            return
+
+        proprietaire = identifiant_worker()
+        if not acquerir_verrou(TACHE_ARCHIVAGE, proprietaire):
+            self.stdout.write(self.style.WARNING("Archivage déjà en cours dans un autre processus."))
+            return
+
+        try:
+            maintenant = timezone.now()
+
+            # 1. ARCHIVER les trajets dont la date de départ est déjà passée
+            total_archives = 0
+            while True:
+                if not acquerir_verrou(TACHE_ARCHIVAGE, proprietaire):
+                    self.stdout.write(self.style.WARNING(VERROU_PERDU))
+                    return
+                archives = archiver_lot(maintenant, taille_lot)
+                if not archives:
+                    break
+                total_archives += archives
+
+            self.stdout.write(self.style.SUCCESS(f"{total_archives} trajets archivés."))
+
+            # 2. SUPPRIMER les statistiques trop anciennes (plus de 8 mois)
+            total_supprimees = 0
+            while True:
+                if not acquerir_verrou(TACHE_ARCHIVAGE, proprietaire):
+                    self.stdout.write(self.style.WARNING(VERROU_PERDU))
+                    return
+                supprimees = purger_lot(maintenant, taille_lot)
+                if not supprimees:
+                    break
+                total_supprimees += supprimees
+
+            self.stdout.write(self.style.SUCCESS(f"{total_supprimees} archives supprimées (plus de 8 mois)."))
+        finally:
+            liberer_verrou(TACHE_ARCHIVAGE, proprietaire)
@@ -0,0 +1,60 @@
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.urls import reverse
+from core.coalescence import invalider_trajet
+from core.models import Trajet
+
+class Command(BaseCommand):
+    help = "Test de charge : GET concurrents sur la page de réservation d'un trajet, avec le nombre de requêtes SQL."
+
+    def add_arguments(self, parser):
+        parser.add_argument('trajet_id', type=int)
+        parser.add_argument('--concurrence', default='1,10,50,100',
+                            help="Niveaux de concurrence à mesurer, séparés par des virgules.")
+
+    def handle(self, *args, **options):
+        trajet_id = options['trajet_id']
+        if not Trajet.objects.filter(id=trajet_id, places_disponibles__gt=0).exists():
+            raise CommandError(f"Trajet {trajet_id} introuvable ou complet.")
+
+        url = reverse('reserver_place', args=[trajet_id])
+        hote = settings.ALLOWED_HOSTS[0] if settings.ALLOWED_HOSTS else 'localhost'
+        compteur = {'requetes': 0}
+        verrou = threading.Lock()
+
+        def compter(execute, sql, params, many, context):
+            with verrou:
+                compteur['requetes'] += 1
+            return execute(sql, params, many, context)
+
+        def visiteur(depart, statuts):
+            client = Client(SERVER_NAME=hote)
+            with connection.execute_wrapper(compter):
+                depart.wait()
+                statuts.append(client.get(url, secure=not settings.DEBUG).status_code)
+            connection.close()
+
+        self.stdout.write(f"{'Concurrence':>12} {'Requêtes SQL':>13} {'Durée (ms)':>11}")
+        for niveau in [int(n) for n in options['concurrence'].split(',')]:
+            # Cache froid à chaque palier : on mesure la coalescence, pas le cache
+            invalider_trajet(trajet_id)
+            compteur['requetes'] = 0
+            depart = threading.Event()
+            statuts = []
+            threads = [threading.Thread(target=visiteur, args=(depart, statuts)) for _ in range(niveau)]
+            for thread in threads:
+                thread.start()
+            debut = time.perf_counter()
+            depart.set()
+            for thread in threads:
+                thread.join()
+            duree = (time.perf_counter() - debut) * 1000
+
+            if any(statut != 200 for statut in statuts):
+                raise CommandError(f"Réponses inattendues : {sorted(set(statuts))}")
+            self.stdout.write(f"{niveau:>12} {compteur['requetes']:>13} {duree:>11.1f}")
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from core.archivage import RETENTION_STATISTIQUES
+from core.partitions import (
+    MOIS_AVANCE,
+    assurer_partitions_a_venir,
+    partitionnement_disponible,
+    supprimer_partitions_expirees,
+)
+
+class Command(BaseCommand):
+    help = "Crée à l'avance les partitions mensuelles de StatistiqueTrajet et retire celles qui ont dépassé 8 mois (PostgreSQL)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--mois', type=int, default=MOIS_AVANCE,
+                            help="Nombre de mois à préparer après le mois courant.")
+        parser.add_argument('--detacher', action='store_true',
+                            help="Détache les partitions expirées au lieu de les supprimer.")
+
+    def handle(self, *args, **options):
+        if not partitionnement_disponible():
+            self.stdout.write(self.style.WARNING(
+                "Partitionnement indisponible sur cette base : la purge se fait par lots (archiver_trajets)."
+            ))
+            return
+
+        maintenant = timezone.now()
+        creees = assurer_partitions_a_venir(maintenant, options['mois'])
+        for nom in creees:
+            self.stdout.write(f"Partition créée : {nom}")
+        self.stdout.write(self.style.SUCCESS(f"{len(creees)} partitions créées."))
+
+        retirees = supprimer_partitions_expirees(maintenant - RETENTION_STATISTIQUES, detacher=options['detacher'])
+        action = "détachées" if options['detacher'] else "supprimées"
+        self.stdout.write(self.style.SUCCESS(f"{retirees} archives {action} (plus de 8 mois)."))
@@ -0,0 +1,40 @@
+import signal
+import threading
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from core.archivage import acquerir_verrou, identifiant_worker, liberer_verrou
+from core.notifications import TACHE_RESUMES, envoyer_resumes
+
+class Command(BaseCommand):
+    help = "Envoie à chaque chauffeur un e-mail récapitulatif de ses nouvelles réservations."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--continu', action='store_true',
+                            help="Envoie les résumés en boucle au lieu d'un seul passage.")
+        parser.add_argument('--intervalle', type=int, default=60,
+                            help="Pause (secondes) entre deux passages en mode continu.")
+
+    def handle(self, *args, **options):
+        arret = threading.Event()
+        if options['continu']:
+            for signum in (signal.SIGINT, signal.SIGTERM):
+                signal.signal(signum, lambda *_: arret.set())
+
+        proprietaire = identifiant_worker()
+        try:
+            while not arret.is_set():
+                if acquerir_verrou(TACHE_RESUMES, proprietaire):
+                    emails, reservations = envoyer_resumes(timezone.now())
+                    if emails or reservations or not options['continu']:
+                        self.stdout.write(self.style.SUCCESS(
+                            f"{emails} résumés envoyés ({reservations} réservations)."
+                        ))
+                elif not options['continu']:
+                    self.stdout.write(self.style.WARNING("Envoi déjà en cours dans un autre processus."))
+
+                if not options['continu']:
+                    break
+                arret.wait(options['intervalle'])
+        finally:
+            liberer_verrou(TACHE_RESUMES, proprietaire)
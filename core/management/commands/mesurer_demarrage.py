@@ -0,0 +1,70 @@
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+
+class Command(BaseCommand):
+    help = "Démarre gunicorn (gunicorn.conf.py) sans puis avec préchauffage et mesure la latence des premières requêtes."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default=None, help="Chemin à interroger (accueil par défaut).")
+        parser.add_argument('--requetes', type=int, default=3, help="Nombre de requêtes mesurées après le démarrage.")
+        parser.add_argument('--delai', type=float, default=30, help="Attente maximale du démarrage (secondes).")
+        parser.add_argument('--attente', type=float, default=2,
+                            help="Pause après l'ouverture du port, le temps que le worker démarre (secondes).")
+
+    def port_libre(self):
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            return sock.getsockname()[1]
+
+    def requete(self, url):
+        debut = time.perf_counter()
+        try:
+            urllib.request.urlopen(url, timeout=30).read()
+        except urllib.error.HTTPError:
+            pass  # une redirection ou une erreur HTTP est aussi une réponse du worker
+        return (time.perf_counter() - debut) * 1000
+
+    def mesurer(self, chemin, prechauffage, nombre, delai, attente):
+        port = self.port_libre()
+        env = dict(os.environ, GUNICORN_PRECHAUFFAGE='1' if prechauffage else '0')
+        commande = [
+            sys.executable, '-m', 'gunicorn', '-c', str(settings.BASE_DIR / 'gunicorn.conf.py'),
+            '--bind', f'127.0.0.1:{port}', '--workers', '1',
+        ]
+        processus = subprocess.Popen(commande, cwd=settings.BASE_DIR, env=env,
+                                     stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            debut = time.perf_counter()
+            while True:
+                try:
+                    socket.create_connection(('127.0.0.1', port), timeout=0.1).close()
+                    break
+                except OSError:
+                    if processus.poll() is not None or time.perf_counter() - debut > delai:
+                        raise CommandError("gunicorn n'a pas démarré.")
+                    time.sleep(0.05)
+            demarrage = (time.perf_counter() - debut) * 1000
+            # Le port est ouvert par le maître avant le démarrage du worker
+            time.sleep(attente)
+            latences = [self.requete(f'http://127.0.0.1:{port}{chemin}') for _ in range(nombre)]
+            return demarrage, latences
+        finally:
+            processus.terminate()
+            processus.wait()
+
+    def handle(self, *args, **options):
+        chemin = options['url'] or reverse('accueil')
+        self.stdout.write(f"{'Préchauffage':<14} {'Port ouvert (ms)':>17} {'Requêtes (ms)':>30}")
+        for prechauffage in (False, True):
+            demarrage, latences = self.mesurer(chemin, prechauffage, options['requetes'], options['delai'], options['attente'])
+            detail = ' / '.join(f'{latence:.1f}' for latence in latences)
+            self.stdout.write(f"{'oui' if prechauffage else 'non':<14} {demarrage:>17.1f} {detail:>30}")
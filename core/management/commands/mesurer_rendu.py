@@ -0,0 +1,35 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.test import Client, override_settings
+from django.urls import reverse
+
+class Command(BaseCommand):
+    help = "Mesure le temps de rendu des pages de liste, sans puis avec le cache des cartes de trajet."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=50)
+
+    def mesurer(self, client, url, iterations):
+        client.get(url, secure=not settings.DEBUG)  # échauffement : gabarits compilés, cache rempli
+        debut = time.perf_counter()
+        for _ in range(iterations):
+            reponse = client.get(url, secure=not settings.DEBUG)
+            assert reponse.status_code == 200, reponse.status_code
+        return (time.perf_counter() - debut) * 1000 / iterations
+
+    def handle(self, *args, **options):
+        hote = settings.ALLOWED_HOSTS[0] if settings.ALLOWED_HOSTS else 'localhost'
+        client = Client(SERVER_NAME=hote)
+        iterations = options['iterations']
+
+        self.stdout.write(f"{'Page':<28} {'Sans cache (ms)':>16} {'Avec cache (ms)':>16}")
+        for nom in ('accueil', 'rechercher_trajet'):
+            url = reverse(nom)
+            with override_settings(CARTES_CACHE_TTL=0):
+                avant = self.mesurer(client, url, iterations)
+            cache.clear()
+            apres = self.mesurer(client, url, iterations)
+            self.stdout.write(f"{url:<28} {avant:>16.2f} {apres:>16.2f}")
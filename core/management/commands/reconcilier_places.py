@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count, F
+from core.budget import budget_requetes
+from core.coalescence import invalider_trajet
+from core.models import Trajet
+from core.places import places_attendues, recalculer_places
+
+
+class Command(BaseCommand):
+    help = "Vérifie et corrige Trajet.places_disponibles d'après le nombre réel de réservations."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true',
+                            help="Signale les écarts sans rien corriger (code de sortie 1 s'il y en a).")
+
+    def handle(self, *args, **options):
+        # 1. Une seule requête agrégée pour trouver les compteurs désynchronisés
+        with budget_requetes(1, nom='reconcilier_places.ecarts'):
+            ecarts = list(
+                Trajet.objects.annotate(nombre_reservations=Count('reservations'))
+                .annotate(attendu=places_attendues(F('nombre_reservations')))
+                .exclude(places_disponibles=F('attendu'))
+                .order_by('date_heure_depart')
+                .values_list('id', 'places_disponibles', 'attendu')
+            )
+
+        for trajet_id, actuel, attendu in ecarts:
+            self.stdout.write(f"Trajet {trajet_id} : {actuel} places disponibles, {attendu} attendues.")
+
+        if not ecarts:
+            self.stdout.write(self.style.SUCCESS("Aucun écart de places."))
+            return
+
+        if options['check']:
+            raise CommandError(f"{len(ecarts)} trajets avec un nombre de places erroné.")
+
+        # 2. Correction en un seul UPDATE : le nombre de réservations est recalculé
+        # dans la requête, au moment de l'écriture
+        with budget_requetes(1, nom='reconcilier_places.correction'):
+            corriges = recalculer_places([ecart[0] for ecart in ecarts])
+        # Hors budget : une écriture de version par trajet corrigé, dans le cache partagé
+        for trajet_id, _, _ in ecarts:
+            invalider_trajet(trajet_id)
+        self.stdout.write(self.style.SUCCESS(f"{corriges} trajets corrigés."))
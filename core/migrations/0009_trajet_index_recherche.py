@@ -0,0 +1,25 @@
+# Generated by Django 5.2.4 on 2026-10-19 11:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_trajet_photo_vehicule'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='trajet',
+            index=models.Index(fields=['date_heure_depart'], name='trajet_depart_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='trajet',
+            index=models.Index(fields=['type_vehicule', 'date_heure_depart'], name='trajet_type_depart_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='trajet',
+            index=models.Index(fields=['prix', 'date_heure_depart'], name='trajet_prix_depart_idx'),
+        ),
+    ]
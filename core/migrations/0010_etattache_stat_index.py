@@ -0,0 +1,27 @@
+# Generated by Django 5.2.4 on 2026-10-19 11:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_trajet_index_recherche'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EtatTache',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nom', models.CharField(max_length=50, unique=True)),
+                ('filigrane', models.DateTimeField(blank=True, null=True)),
+                ('verrou_proprietaire', models.CharField(blank=True, max_length=100)),
+                ('verrou_expire', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='statistiquetrajet',
+            index=models.Index(fields=['date_heure_depart'], name='stat_depart_idx'),
+        ),
+    ]
@@ -0,0 +1,170 @@
+# Generated by Django 5.2.4 on 2026-10-19 11:45
+
+import re
+from datetime import datetime, timezone as dt_timezone
+
+from django.db import migrations, models, transaction
+
+# Copie figée des fonctions de core/partitions.py à la date de la migration :
+# la conversion doit rester rejouable même si le module évolue.
+TABLE = 'core_statistiquetrajet'
+PARTITION_DEFAUT = f'{TABLE}_defaut'
+MOTIF_PARTITION = re.compile(rf'^{TABLE}_p(\d{{4}})_(\d{{2}})$')
+
+
+def debut_mois(moment):
+    moment = moment.astimezone(dt_timezone.utc)
+    return datetime(moment.year, moment.month, 1, tzinfo=dt_timezone.utc)
+
+
+def mois_suivant(debut):
+    if debut.month == 12:
+        return debut.replace(year=debut.year + 1, month=1)
+    return debut.replace(month=debut.month + 1)
+
+
+def litteral(moment):
+    return f"'{moment.isoformat()}'"
+
+
+def partitions_existantes(cursor):
+    cursor.execute(
+        "SELECT enfant.relname FROM pg_inherits "
+        "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+        "JOIN pg_class enfant ON enfant.oid = pg_inherits.inhrelid "
+        "WHERE parent.relname = %s",
+        [TABLE],
+    )
+    debuts = set()
+    for (nom,) in cursor.fetchall():
+        correspondance = MOTIF_PARTITION.match(nom)
+        if correspondance:
+            annee, mois = map(int, correspondance.groups())
+            debuts.add(datetime(annee, mois, 1, tzinfo=dt_timezone.utc))
+    return debuts
+
+
+def creer_partition(cursor, debut):
+    nom = f'{TABLE}_p{debut:%Y_%m}'
+    fin = mois_suivant(debut)
+    cursor.execute(f'CREATE TABLE "{nom}" (LIKE "{TABLE}" INCLUDING DEFAULTS INCLUDING CONSTRAINTS)')
+    cursor.execute(
+        f'WITH deplacees AS (DELETE FROM "{PARTITION_DEFAUT}" '
+        f'WHERE date_heure_depart >= %s AND date_heure_depart < %s RETURNING *) '
+        f'INSERT INTO "{nom}" SELECT * FROM deplacees',
+        [debut, fin],
+    )
+    cursor.execute(
+        f'ALTER TABLE "{TABLE}" ATTACH PARTITION "{nom}" '
+        f'FOR VALUES FROM ({litteral(debut)}) TO ({litteral(fin)})'
+    )
+
+
+def assurer_partitions(cursor, debut, fin):
+    existantes = partitions_existantes(cursor)
+    mois = debut_mois(debut)
+    while mois <= fin:
+        if mois not in existantes:
+            creer_partition(cursor, mois)
+        mois = mois_suivant(mois)
+
+
+def definitions_index(cursor, table):
+    cursor.execute(
+        "SELECT indexdef FROM pg_indexes WHERE tablename = %s AND indexname <> %s",
+        [table, f'{table}_pkey'],
+    )
+    # « ON ONLY » apparaît pour les index d'une table partitionnée
+    return [ligne[0].replace(' ON ONLY ', ' ON ') for ligne in cursor.fetchall()]
+
+
+def definitions_cles_etrangeres(cursor, table):
+    cursor.execute(
+        "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+        "WHERE conrelid = %s::regclass AND contype = 'f'",
+        [table],
+    )
+    return cursor.fetchall()
+
+
+def sequence_id(cursor, table):
+    cursor.execute("SELECT pg_get_serial_sequence(%s, 'id')", [f'"{table}"'])
+    return cursor.fetchone()[0]
+
+
+def recreer_table(connexion, partitionnee):
+    """
+    Reconstruit core_statistiquetrajet, partitionnée ou non, en conservant
+    les données, les index, les clés étrangères et la séquence des id.
+    """
+    ancienne = f'{TABLE}_ancienne'
+    with transaction.atomic(using=connexion.alias), connexion.cursor() as cursor:
+        cursor.execute(f'ALTER TABLE "{TABLE}" RENAME TO "{ancienne}"')
+        # Les noms d'index sont globaux au schéma : on libère celui de la clé primaire
+        cursor.execute(f'ALTER INDEX "{TABLE}_pkey" RENAME TO "{ancienne}_pkey"')
+        definitions = definitions_index(cursor, ancienne)
+        cles_etrangeres = definitions_cles_etrangeres(cursor, ancienne)
+        ancienne_sequence = sequence_id(cursor, ancienne)
+        # Prochain id de l'ancienne séquence : les id déjà attribués (même
+        # supprimés depuis) ne doivent pas resservir
+        cursor.execute(f'SELECT last_value + CASE WHEN is_called THEN 1 ELSE 0 END FROM {ancienne_sequence}')
+        prochain_id = cursor.fetchone()[0]
+
+        partition_par = ' PARTITION BY RANGE (date_heure_depart)' if partitionnee else ''
+        cursor.execute(
+            f'CREATE TABLE "{TABLE}" (LIKE "{ancienne}" INCLUDING DEFAULTS INCLUDING IDENTITY '
+            f'INCLUDING CONSTRAINTS){partition_par}'
+        )
+        # La clé primaire d'une table partitionnée doit contenir la clé de partition
+        cle = 'id, date_heure_depart' if partitionnee else 'id'
+        cursor.execute(f'ALTER TABLE "{TABLE}" ADD CONSTRAINT "{TABLE}_pkey" PRIMARY KEY ({cle})')
+
+        if partitionnee:
+            cursor.execute(f'CREATE TABLE "{PARTITION_DEFAUT}" PARTITION OF "{TABLE}" DEFAULT')
+            cursor.execute(f'SELECT MIN(date_heure_depart), MAX(date_heure_depart) FROM "{ancienne}"')
+            debut, fin = cursor.fetchone()
+            if debut is not None:
+                assurer_partitions(cursor, debut, fin)
+
+        cursor.execute(f'INSERT INTO "{TABLE}" SELECT * FROM "{ancienne}"')
+        nouvelle_sequence = sequence_id(cursor, TABLE)
+        cursor.execute(
+            f'SELECT setval(%s, GREATEST(COALESCE(MAX(id), 0) + 1, %s), false) FROM "{TABLE}"',
+            [nouvelle_sequence, prochain_id],
+        )
+        # Sans CASCADE : la séquence d'identité, les index et les partitions
+        # partent avec la table, tout autre objet dépendant doit faire échouer
+        cursor.execute(f'DROP TABLE "{ancienne}"')
+        # La nouvelle séquence d'identité reprend le nom de l'ancienne
+        cursor.execute(f'ALTER SEQUENCE {nouvelle_sequence} RENAME TO {ancienne_sequence.split(".")[-1]}')
+
+        for definition in definitions:
+            cursor.execute(definition.replace(f'.{ancienne} ', f'.{TABLE} ').replace(f' {ancienne} ', f' {TABLE} '))
+        for nom, definition in cles_etrangeres:
+            cursor.execute(f'ALTER TABLE "{TABLE}" ADD CONSTRAINT "{nom}" {definition}')
+
+
+def partitionner(apps, schema_editor):
+    # Sous SQLite, la table reste ordinaire (purge par lots via stat_depart_idx)
+    if schema_editor.connection.vendor == 'postgresql':
+        recreer_table(schema_editor.connection, partitionnee=True)
+
+
+def departitionner(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        recreer_table(schema_editor.connection, partitionnee=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_etattache_stat_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='statistiquetrajet',
+            index=models.Index(fields=['chauffeur', 'date_heure_depart'], name='stat_chauffeur_depart_idx'),
+        ),
+        migrations.RunPython(partitionner, departitionner),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.4 on 2026-10-19 11:46
+
+from django.db import migrations, models
+
+
+def marquer_existantes(apps, schema_editor):
+    # Les réservations antérieures ont déjà fait l'objet d'un e-mail immédiat
+    Reservation = apps.get_model('core', 'Reservation')
+    Reservation.objects.update(notifiee=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_statistiquetrajet_partitions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reservation',
+            name='notifiee',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.RunPython(marquer_existantes, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(condition=models.Q(('notifiee', False)), fields=['date_reservation'], name='resa_a_notifier_idx'),
+        ),
+    ]
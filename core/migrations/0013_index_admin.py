@@ -0,0 +1,17 @@
+# Generated by Django 5.2.4 on 2026-10-19 11:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_reservation_notifiee'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['date_reservation'], name='resa_date_idx'),
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.4 on 2026-10-19 11:51
+
+import re
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def normaliser_telephone(telephone):
+    # Copie figée de core.models.normaliser_telephone à la date de la migration
+    chiffres = re.sub(r'\D', '', telephone or '')
+    if chiffres.startswith('00'):
+        chiffres = chiffres[2:]
+    if chiffres.startswith('224') and len(chiffres) > 9:
+        chiffres = chiffres[3:]
+    return chiffres
+
+
+def normaliser_et_dedoublonner(apps, schema_editor):
+    Reservation = apps.get_model('core', 'Reservation')
+    Trajet = apps.get_model('core', 'Trajet')
+
+    vues = set()
+    doublons = []
+    for reservation in Reservation.objects.order_by('id').iterator():
+        telephone = normaliser_telephone(reservation.telephone)
+        if (telephone, reservation.trajet_id) in vues:
+            doublons.append(reservation)
+            continue
+        vues.add((telephone, reservation.trajet_id))
+        if telephone != reservation.telephone:
+            Reservation.objects.filter(pk=reservation.pk).update(telephone=telephone)
+
+    # On garde la première réservation et on rend les places des doublons
+    for reservation in doublons:
+        reservation.delete()
+        Trajet.objects.filter(pk=reservation.trajet_id).update(places_disponibles=F('places_disponibles') + 1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_index_admin'),
+    ]
+
+    operations = [
+        migrations.RunPython(normaliser_et_dedoublonner, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='reservation',
+            constraint=models.UniqueConstraint(fields=('telephone', 'trajet'), name='resa_unique_telephone_trajet'),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.4 on 2026-10-19 12:05
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_reservation_telephone_unique'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='trajet',
+            name='date_modification',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.4 on 2026-10-19 12:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_trajet_date_modification'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='statistiquetrajet',
+            index=models.Index(fields=['statut', 'date_heure_depart'], name='stat_statut_depart_idx'),
+        ),
+    ]
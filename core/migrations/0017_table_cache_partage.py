@@ -0,0 +1,20 @@
+# Generated by Django 5.2.4 on 2026-10-19 12:20
+
+from django.core.management import call_command
+from django.db import migrations
+
+
+def creer_table_cache(apps, schema_editor):
+    # Table du cache « partage » quand il utilise DatabaseCache (sans effet sinon)
+    call_command('createcachetable', database=schema_editor.connection.alias, verbosity=0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_index_filtres_admin'),
+    ]
+
+    operations = [
+        migrations.RunPython(creer_table_cache, migrations.RunPython.noop),
+    ]
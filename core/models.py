@@ -1,11 +1,22 @@
 from django.db import models
 from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin, BaseUserManager
+import re
 import uuid
 from django.conf import settings
 # ----------- Fonction pour générer un code unique -----------
 def generate_code_unique():
     return str(uuid.uuid4()).split('-')[0]
 
+# ----------- Normalisation des numéros de téléphone -----------
+def normaliser_telephone(telephone):
+    """Ne garde que les chiffres, sans l'indicatif de la Guinée (+224 / 00224)."""
+    chiffres = re.sub(r'\D', '', telephone or '')
+    if chiffres.startswith('00'):
+        chiffres = chiffres[2:]
+    if chiffres.startswith('224') and len(chiffres) > 9:
+        chiffres = chiffres[3:]
+    return chiffres
+
 # ----------- Manager personnalisé pour Utilisateur -----------
 class UtilisateurManager(BaseUserManager):
     def create_user(self, telephone, password=None, **extra_fields):
@@ -68,6 +79,18 @@ class Trajet(models.Model):
     # ✅ Total initial de places
     places_totales = models.PositiveIntegerField(default=1)
 
+    # Version du trajet pour le cache des cartes (voir core/fragments.py).
+    # Les update() sur les places doivent la renseigner eux-mêmes.
+    date_modification = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        # Un index par forme de recherche (voir core/filtres.py)
+        indexes = [
+            models.Index(fields=['date_heure_depart'], name='trajet_depart_idx'),
+            models.Index(fields=['type_vehicule', 'date_heure_depart'], name='trajet_type_depart_idx'),
+            models.Index(fields=['prix', 'date_heure_depart'], name='trajet_prix_depart_idx'),
+        ]
+
     def save(self, *args, **kwargs):
         if not self.pk:
             self.places_totales = self.places_disponibles
@@ -79,9 +102,23 @@ class Trajet(models.Model):
 class Reservation(models.Model):
     trajet = models.ForeignKey(Trajet, on_delete=models.CASCADE, related_name='reservations')
     nom = models.CharField(max_length=100)
-    telephone = models.CharField(max_length=15)
+    telephone = models.CharField(max_length=15)  # normalisé (voir normaliser_telephone)
     email = models.EmailField(blank=True)
     date_reservation = models.DateTimeField(auto_now_add=True)
+    # Le chauffeur a-t-il été prévenu (e-mail immédiat ou résumé) ?
+    notifiee = models.BooleanField(default=False)
+
+    class Meta:
+        indexes = [
+            # Réservations en attente de notification (résumés, filtre « notifiee » de l'admin)
+            models.Index(fields=['date_reservation'], condition=models.Q(notifiee=False), name='resa_a_notifier_idx'),
+            # Liste de l'admin, triée par date_reservation
+            models.Index(fields=['date_reservation'], name='resa_date_idx'),
+        ]
+        constraints = [
+            # Sert aussi d'index pour la recherche des réservations par téléphone
+            models.UniqueConstraint(fields=['telephone', 'trajet'], name='resa_unique_telephone_trajet'),
+        ]
 
     def __str__(self):
         return f"Réservation de {self.nom} ({self.telephone}) pour le trajet {self.trajet}"
@@ -89,6 +126,7 @@ class Reservation(models.Model):
 
 
 
+# Sous PostgreSQL, la table est partitionnée par mois (voir core/partitions.py)
 class StatistiqueTrajet(models.Model):
     chauffeur = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -109,5 +147,26 @@ class StatistiqueTrajet(models.Model):
     statut = models.CharField(max_length=20, choices=STATUT_CHOICES)
     date_archivage = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['date_heure_depart'], name='stat_depart_idx'),
+            models.Index(fields=['chauffeur', 'date_heure_depart'], name='stat_chauffeur_depart_idx'),
+            # Filtre « statut » de l'admin, trié par date_heure_depart
+            models.Index(fields=['statut', 'date_heure_depart'], name='stat_statut_depart_idx'),
+        ]
+
     def __str__(self):
         return f"{self.chauffeur.nom} - {self.ville_depart} → {self.ville_arrivee} ({self.statut})"
+
+
+# ----------- État des tâches de fond (filigrane + verrou) -----------
+class EtatTache(models.Model):
+    nom = models.CharField(max_length=50, unique=True)
+    # Dernier date_heure_depart archivé (suivi de l'avancement, ne filtre pas les lots)
+    filigrane = models.DateTimeField(blank=True, null=True)
+    # Verrou à bail : un seul worker détient la tâche jusqu'à verrou_expire
+    verrou_proprietaire = models.CharField(max_length=100, blank=True)
+    verrou_expire = models.DateTimeField(blank=True, null=True)
+
+    def __str__(self):
+        return f"{self.nom} (filigrane : {self.filigrane})"
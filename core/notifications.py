@@ -0,0 +1,150 @@
+import logging
+import threading
+from datetime import timedelta
+from itertools import groupby
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection, send_mail
+from django.db import close_old_connections
+from django.template.loader import get_template
+from django.utils import timezone
+
+from .archivage import acquerir_verrou, identifiant_worker, liberer_verrou
+from .budget import budget_requetes
+from .models import Reservation
+
+TACHE_RESUMES = 'envoyer_resumes'
+SUJET_RESERVATION = "🚗 Nouvelle réservation sur votre trajet"
+SUJET_RESUME = "🚗 Nouvelles réservations sur vos trajets"
+
+logger = logging.getLogger('core.notifications')
+
+
+def depart_imminent(trajet, maintenant):
+    return trajet.date_heure_depart - maintenant <= timedelta(seconds=settings.NOTIFICATIONS_DELAI_URGENT)
+
+
+def notifier_reservation(reservation, conducteur, maintenant):
+    """
+    Prévient le chauffeur d'une réservation. En mode résumé, la réservation
+    attend le prochain envoi groupé, sauf si le départ est imminent.
+    """
+    trajet = reservation.trajet
+    if settings.NOTIFICATIONS_RESUME and not depart_imminent(trajet, maintenant):
+        return False
+
+    if conducteur.email:
+        send_mail(
+            subject=SUJET_RESERVATION,
+            message=(
+                f"Bonjour,\n\nUne nouvelle réservation a été effectuée pour votre trajet :\n"
+                f"{trajet.ville_depart} ➜ {trajet.ville_arrivee} à {trajet.date_heure_depart}.\n"
+                f"Numéro du passager : {reservation.telephone}\n\nMerci."
+            ),
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            recipient_list=[conducteur.email],
+            fail_silently=True,
+        )
+    Reservation.objects.filter(pk=reservation.pk).update(notifiee=True)
+    return True
+
+
+@budget_requetes(3)
+def envoyer_resumes(maintenant):
+    """
+    Envoie un e-mail récapitulatif par chauffeur pour les réservations en
+    attente, sur une seule connexion SMTP. Un chauffeur n'est servi qu'une fois
+    la fenêtre écoulée depuis sa plus ancienne réservation en attente, ou tout
+    de suite si l'un des départs est imminent. Seules les réservations dont le
+    résumé est parti sont marquées notifiées : un échec SMTP est journalisé et
+    le résumé repart au passage suivant. Retourne (e-mails, réservations).
+    """
+    limite = maintenant - timedelta(seconds=settings.NOTIFICATIONS_FENETRE)
+    en_attente = (
+        Reservation.objects.filter(notifiee=False)
+        .select_related('trajet__conducteur')
+        .order_by('trajet__conducteur_id', 'trajet__date_heure_depart', 'trajet_id', 'date_reservation')
+    )
+
+    gabarit = get_template('core/emails/resume_reservations.txt')
+    resumes = []
+    traitees = []
+    for _, groupe in groupby(en_attente, key=lambda reservation: reservation.trajet.conducteur_id):
+        reservations = list(groupe)
+        pret = min(r.date_reservation for r in reservations) <= limite or any(
+            depart_imminent(r.trajet, maintenant) for r in reservations
+        )
+        if not pret:
+            continue
+
+        conducteur = reservations[0].trajet.conducteur
+        if conducteur.email:
+            corps = gabarit.render({'conducteur': conducteur, 'reservations': reservations})
+            message = EmailMessage(SUJET_RESUME, corps, settings.DEFAULT_FROM_EMAIL, [conducteur.email])
+            resumes.append((message, [r.pk for r in reservations]))
+        else:
+            # Personne à prévenir : inutile de les garder en attente
+            traitees.extend(r.pk for r in reservations)
+
+    envoyes = 0
+    if resumes:
+        try:
+            with get_connection(fail_silently=False) as connexion:
+                for message, pks in resumes:
+                    try:
+                        connexion.send_messages([message])
+                    except Exception:
+                        logger.exception("résumé non envoyé à %s, nouvel essai au prochain passage", message.to[0])
+                        continue
+                    envoyes += 1
+                    traitees.extend(pks)
+        except Exception:
+            # Ouverture ou fermeture de la connexion SMTP en échec
+            logger.exception("connexion SMTP en échec pendant l'envoi des résumés")
+    if traitees:
+        Reservation.objects.filter(pk__in=traitees).update(notifiee=True)
+    return envoyes, len(traitees)
+
+
+def boucle_resumes(intervalle=60, arret=None):
+    """
+    Envoie les résumés toutes les `intervalle` secondes tant que l'évènement
+    `arret` n'est pas levé. Le verrou TACHE_RESUMES n'en laisse tourner qu'un
+    à la fois ; une erreur dans un passage est journalisée.
+    """
+    arret = arret or threading.Event()
+    proprietaire = identifiant_worker()
+    try:
+        while not arret.is_set():
+            close_old_connections()
+            try:
+                if acquerir_verrou(TACHE_RESUMES, proprietaire):
+                    envoyer_resumes(timezone.now())
+            except Exception:
+                logger.exception("passage d'envoi des résumés en échec")
+            arret.wait(intervalle)
+    finally:
+        liberer_verrou(TACHE_RESUMES, proprietaire)
+        close_old_connections()
+
+
+def lancer_resumes_en_arriere_plan(intervalle=60):
+    """
+    Démarre boucle_resumes dans un thread démon du processus courant.
+    Retourne (arret, thread), voir arreter_resumes_en_arriere_plan.
+    """
+    arret = threading.Event()
+    thread = threading.Thread(
+        target=boucle_resumes,
+        kwargs={'intervalle': intervalle, 'arret': arret},
+        name='envoi-resumes',
+        daemon=True,
+    )
+    thread.start()
+    return arret, thread
+
+
+def arreter_resumes_en_arriere_plan(arret, thread, delai=10):
+    arret.set()
+    thread.join(delai)
+    liberer_verrou(TACHE_RESUMES, identifiant_worker())
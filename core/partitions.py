@@ -0,0 +1,127 @@
+"""
+Partitionnement mensuel de StatistiqueTrajet (PostgreSQL uniquement).
+
+La table est partitionnée par plage sur date_heure_depart, un mois par
+partition, plus une partition par défaut qui reçoit les lignes hors plage.
+La rétention se fait en supprimant (ou détachant) des partitions entières
+plutôt qu'avec un grand DELETE. Sous SQLite, il n'y a pas de partitions :
+la purge retombe sur des suppressions par lots via l'index stat_depart_idx.
+"""
+import re
+from datetime import datetime, timezone as dt_timezone
+
+from django.db import connection as connexion_defaut, transaction
+
+TABLE = 'core_statistiquetrajet'
+PARTITION_DEFAUT = f'{TABLE}_defaut'
+MOTIF_PARTITION = re.compile(rf'^{TABLE}_p(\d{{4}})_(\d{{2}})$')
+MOIS_AVANCE = 3
+
+
+def partitionnement_disponible(connexion=None):
+    return (connexion or connexion_defaut).vendor == 'postgresql'
+
+
+def debut_mois(moment):
+    moment = moment.astimezone(dt_timezone.utc)
+    return datetime(moment.year, moment.month, 1, tzinfo=dt_timezone.utc)
+
+
+def mois_suivant(debut):
+    if debut.month == 12:
+        return debut.replace(year=debut.year + 1, month=1)
+    return debut.replace(month=debut.month + 1)
+
+
+def nom_partition(debut):
+    return f'{TABLE}_p{debut:%Y_%m}'
+
+
+def _litteral(moment):
+    # Les bornes de partition sont du DDL : pas de paramètres liés possibles
+    return f"'{moment.isoformat()}'"
+
+
+def partitions_existantes(connexion=None):
+    """Retourne {nom: début du mois} des partitions mensuelles attachées."""
+    connexion = connexion or connexion_defaut
+    with connexion.cursor() as cursor:
+        cursor.execute(
+            "SELECT enfant.relname FROM pg_inherits "
+            "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+            "JOIN pg_class enfant ON enfant.oid = pg_inherits.inhrelid "
+            "WHERE parent.relname = %s",
+            [TABLE],
+        )
+        noms = [ligne[0] for ligne in cursor.fetchall()]
+
+    partitions = {}
+    for nom in noms:
+        correspondance = MOTIF_PARTITION.match(nom)
+        if correspondance:
+            annee, mois = map(int, correspondance.groups())
+            partitions[nom] = datetime(annee, mois, 1, tzinfo=dt_timezone.utc)
+    return partitions
+
+
+def creer_partition(debut, connexion=None):
+    """
+    Crée et attache la partition du mois commençant à `debut`. Les lignes de
+    ce mois déjà tombées dans la partition par défaut y sont déplacées.
+    """
+    connexion = connexion or connexion_defaut
+    nom = nom_partition(debut)
+    fin = mois_suivant(debut)
+    with transaction.atomic(using=connexion.alias), connexion.cursor() as cursor:
+        cursor.execute(f'CREATE TABLE "{nom}" (LIKE "{TABLE}" INCLUDING DEFAULTS INCLUDING CONSTRAINTS)')
+        cursor.execute(
+            f'WITH deplacees AS (DELETE FROM "{PARTITION_DEFAUT}" '
+            f'WHERE date_heure_depart >= %s AND date_heure_depart < %s RETURNING *) '
+            f'INSERT INTO "{nom}" SELECT * FROM deplacees',
+            [debut, fin],
+        )
+        cursor.execute(
+            f'ALTER TABLE "{TABLE}" ATTACH PARTITION "{nom}" '
+            f'FOR VALUES FROM ({_litteral(debut)}) TO ({_litteral(fin)})'
+        )
+    return nom
+
+
+def assurer_partitions(debut, fin, connexion=None):
+    """Crée les partitions manquantes pour chaque mois de [debut, fin]."""
+    existantes = set(partitions_existantes(connexion).values())
+    creees = []
+    mois = debut_mois(debut)
+    while mois <= fin:
+        if mois not in existantes:
+            creees.append(creer_partition(mois, connexion))
+        mois = mois_suivant(mois)
+    return creees
+
+
+def assurer_partitions_a_venir(maintenant, mois_avance=MOIS_AVANCE, connexion=None):
+    """Crée à l'avance les partitions du mois courant et des `mois_avance` suivants."""
+    fin = debut_mois(maintenant)
+    for _ in range(mois_avance):
+        fin = mois_suivant(fin)
+    return assurer_partitions(maintenant, fin, connexion)
+
+
+def supprimer_partitions_expirees(limite, detacher=False, connexion=None):
+    """
+    Supprime (ou détache) les partitions entièrement antérieures à `limite`.
+    Retourne le nombre de lignes retirées de la table.
+    """
+    connexion = connexion or connexion_defaut
+    total = 0
+    for nom, debut in sorted(partitions_existantes(connexion).items(), key=lambda item: item[1]):
+        if mois_suivant(debut) > limite:
+            continue
+        with transaction.atomic(using=connexion.alias), connexion.cursor() as cursor:
+            cursor.execute(f'SELECT COUNT(*) FROM "{nom}"')
+            total += cursor.fetchone()[0]
+            cursor.execute(f'ALTER TABLE "{TABLE}" DETACH PARTITION "{nom}"')
+            if not detacher:
+                cursor.execute(f'DROP TABLE "{nom}"')
+    return total
+
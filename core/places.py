@@ -0,0 +1,32 @@
+"""
+Recalcul de Trajet.places_disponibles d'après le nombre réel de réservations,
+en une seule requête quel que soit le nombre de trajets concernés.
+"""
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from .models import Reservation, Trajet
+
+
+def places_attendues(nombre_reservations):
+    return Greatest(F('places_totales') - nombre_reservations, Value(0))
+
+
+def recalculer_places(trajet_ids):
+    """
+    Un seul UPDATE : le nombre de réservations est recompté dans la requête,
+    au moment de l'écriture. date_modification change aussi, pour que les
+    cartes en cache soient renouvelées (core/fragments.py). Les versions des
+    trajets (core/coalescence.py) restent à invalider par l'appelant.
+    """
+    nombre_reservations = (
+        Reservation.objects.filter(trajet=OuterRef('pk'))
+        .values('trajet')
+        .annotate(total=Count('id'))
+        .values('total')
+    )
+    return Trajet.objects.filter(id__in=trajet_ids).update(
+        places_disponibles=places_attendues(Coalesce(Subquery(nombre_reservations), Value(0))),
+        date_modification=timezone.now(),
+    )
@@ -0,0 +1,345 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from io import StringIO
+from smtplib import SMTPException
+from unittest import mock, skipUnless
+
+from django.conf import settings
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from .budget import BudgetRequetesDepasse, budget_requetes
+from .checks import verifier_cache_partage
+from .coalescence import invalider_trajet, version_trajet
+from .filtres import FORMES_INDEXEES, RechercheNonIndexable, composer_recherche
+from .models import Reservation, Trajet, Utilisateur
+from .notifications import envoyer_resumes
+
+# Un jeu de critères par forme de FORMES_INDEXEES
+CRITERES_PAR_INDEX = {
+    'trajet_depart_idx': {},
+    'trajet_type_depart_idx': {'type_vehicule': 'taxi'},
+    'trajet_prix_depart_idx': {'inclure_passes': True, 'prix_max': Decimal('11000')},
+}
+
+
+class RechercheIndexeeTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        conducteur = Utilisateur.objects.create_user('620000001', 'motdepasse', email='c@angnewa.test')
+        maintenant = timezone.now()
+        types = [choix for choix, _ in Trajet.TYPE_VEHICULE_CHOICES]
+        Trajet.objects.bulk_create([
+            Trajet(
+                conducteur=conducteur,
+                ville_depart='Conakry',
+                ville_arrivee='Labé',
+                date_heure_depart=maintenant + timedelta(hours=i - 100),
+                places_disponibles=4,
+                places_totales=4,
+                prix=Decimal(10000 + 500 * (i % 40)),
+                type_vehicule=types[i % len(types)],
+            )
+            for i in range(400)
+        ])
+        # Statistiques à jour, comme en production (autovacuum, PRAGMA optimize)
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def plan(self, criteres):
+        requete = composer_recherche(criteres, timezone.now())
+        if connection.vendor == 'postgresql':
+            # Sur une petite table, PostgreSQL préfère un parcours séquentiel :
+            # on vérifie que l'index est utilisable, pas le choix du planificateur
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+        return requete.explain()
+
+    def test_chaque_forme_est_couverte(self):
+        self.assertEqual(set(CRITERES_PAR_INDEX), set(FORMES_INDEXEES))
+
+    def test_chaque_forme_utilise_son_index(self):
+        for index, criteres in CRITERES_PAR_INDEX.items():
+            with self.subTest(index=index):
+                self.assertIn(index, self.plan(criteres))
+
+    def test_trajets_passes_sans_borne_refuses(self):
+        with self.assertRaises(RechercheNonIndexable):
+            composer_recherche({'inclure_passes': True}, timezone.now())
+        with self.assertRaises(RechercheNonIndexable):
+            composer_recherche({'inclure_passes': True, 'ville_depart': 'Conakry'}, timezone.now())
+
+    def test_trajets_passes_avec_date_acceptes(self):
+        criteres = {'inclure_passes': True, 'date_min': timezone.now() - timedelta(days=2)}
+        self.assertIn('trajet_depart_idx', self.plan(criteres))
+
+CACHE_PARTAGE_EN_BASE = {
+    'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+    'LOCATION': 'angnewa_cache_test',
+}
+
+
+class BudgetRequetesTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.conducteur = Utilisateur.objects.create_user('620000002', 'motdepasse', email='b@angnewa.test')
+
+    def test_dans_le_budget(self):
+        with budget_requetes(1) as budget:
+            Utilisateur.objects.count()
+        self.assertEqual(len(budget.requetes), 1)
+
+    def test_depassement_leve(self):
+        with self.assertRaises(BudgetRequetesDepasse):
+            with budget_requetes(1, nom='test'):
+                Utilisateur.objects.count()
+                Utilisateur.objects.count()
+
+    @override_settings(BUDGET_REQUETES_STRICT=False)
+    def test_depassement_journalise_hors_mode_strict(self):
+        with self.assertLogs('core.budget', 'WARNING') as journal:
+            with budget_requetes(1, nom='test'):
+                Utilisateur.objects.count()
+                Utilisateur.objects.count()
+        self.assertIn('test', journal.output[0])
+
+    def test_decorateur_compteur_neuf_par_appel(self):
+        @budget_requetes(1)
+        def compter():
+            return Utilisateur.objects.count()
+
+        compter()
+        compter()
+
+    def test_versions_sans_requete_par_defaut(self):
+        with budget_requetes(0):
+            invalider_trajet(123456)
+            version_trajet(123456)
+
+    @override_settings(CACHES={**settings.CACHES, 'partage': CACHE_PARTAGE_EN_BASE})
+    def test_cache_partage_en_base_compte_sans_transactions(self):
+        call_command('createcachetable', verbosity=0)
+        with budget_requetes(10) as budget:
+            invalider_trajet(123456)
+            invalider_trajet(123457)
+        self.assertTrue(budget.requetes)
+        self.assertTrue(all('angnewa_cache_test' in sql for sql in budget.requetes))
+        self.assertEqual(verifier_cache_partage(None)[0].id, 'core.W001')
+
+
+class ReconcilierPlacesTests(TestCase):
+    def test_plusieurs_trajets_desynchronises(self):
+        conducteur = Utilisateur.objects.create_user('620000003', 'motdepasse', email='r@angnewa.test')
+        trajets = [
+            Trajet.objects.create(
+                conducteur=conducteur, ville_depart='Conakry', ville_arrivee='Kindia',
+                date_heure_depart=timezone.now() + timedelta(days=1), places_disponibles=4,
+                prix=Decimal('50000'), type_vehicule='taxi',
+            )
+            for _ in range(3)
+        ]
+        Reservation.objects.create(trajet=trajets[0], nom='A', telephone='621000001')
+        Reservation.objects.create(trajet=trajets[1], nom='B', telephone='621000002')
+        versions = [version_trajet(trajet.id) for trajet in trajets]
+
+        sortie = StringIO()
+        call_command('reconcilier_places', stdout=sortie)
+
+        self.assertIn('2 trajets corrigés', sortie.getvalue())
+        self.assertEqual(
+            [Trajet.objects.get(id=trajet.id).places_disponibles for trajet in trajets], [3, 3, 4]
+        )
+        self.assertNotEqual(version_trajet(trajets[0].id), versions[0])
+        self.assertNotEqual(version_trajet(trajets[1].id), versions[1])
+
+
+class EnvoyerResumesTests(TestCase):
+    def test_echec_smtp_garde_les_reservations_en_attente(self):
+        depart = timezone.now() + timedelta(days=2)
+        for i, email in enumerate(['panne@angnewa.test', 'ok@angnewa.test', '']):
+            conducteur = Utilisateur.objects.create_user(f'62000001{i}', 'motdepasse', email=email)
+            trajet = Trajet.objects.create(
+                conducteur=conducteur, ville_depart='Conakry', ville_arrivee='Labé',
+                date_heure_depart=depart, places_disponibles=4, prix=Decimal('80000'), type_vehicule='taxi',
+            )
+            Reservation.objects.create(trajet=trajet, nom='P', telephone=f'62300000{i}')
+
+        envoyer_messages = EmailBackend.send_messages
+
+        def smtp_en_panne(backend, messages):
+            if messages[0].to == ['panne@angnewa.test']:
+                raise SMTPException("serveur indisponible")
+            return envoyer_messages(backend, messages)
+
+        with mock.patch.object(EmailBackend, 'send_messages', smtp_en_panne), \
+                self.assertLogs('core.notifications', 'ERROR'):
+            emails, reservations = envoyer_resumes(depart)
+
+        self.assertEqual((emails, reservations), (1, 2))
+        self.assertEqual([message.to for message in mail.outbox], [['ok@angnewa.test']])
+        self.assertEqual(
+            list(Reservation.objects.filter(notifiee=False).values_list('trajet__conducteur__email', flat=True)),
+            ['panne@angnewa.test'],
+        )
+
+        # Le serveur revient : le résumé en retard part au passage suivant
+        self.assertEqual(envoyer_resumes(depart), (1, 1))
+        self.assertFalse(Reservation.objects.filter(notifiee=False).exists())
+
+
+class ArchiverTrajetsTests(TestCase):
+    def test_arret_si_le_verrou_est_perdu(self):
+        conducteur = Utilisateur.objects.create_user('620000020', 'motdepasse')
+        Trajet.objects.create(
+            conducteur=conducteur, ville_depart='Conakry', ville_arrivee='Mamou',
+            date_heure_depart=timezone.now() - timedelta(days=1), places_disponibles=4,
+            prix=Decimal('60000'), type_vehicule='taxi',
+        )
+        sortie = StringIO()
+        # Verrou obtenu au démarrage, puis repris par un autre processus avant le premier lot
+        with mock.patch('core.management.commands.archiver_trajets.acquerir_verrou', side_effect=[True, False]):
+            call_command('archiver_trajets', stdout=sortie)
+
+        self.assertIn('Verrou d\'archivage perdu', sortie.getvalue())
+        self.assertEqual(Trajet.objects.count(), 1)
+
+
+class AdminReservationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = Utilisateur.objects.create_superuser('620000004', 'motdepasse', email='a@angnewa.test')
+        cls.trajets = [
+            Trajet.objects.create(
+                conducteur=cls.admin, ville_depart='Conakry', ville_arrivee='Mamou',
+                date_heure_depart=timezone.now() + timedelta(days=2), places_disponibles=3,
+                prix=Decimal('80000'), type_vehicule='minibus',
+            )
+            for _ in range(2)
+        ]
+
+    def reserver(self):
+        for i, trajet in enumerate(self.trajets * 2):
+            Reservation.objects.create(trajet=trajet, nom='P', telephone=f'62200000{i}')
+        Trajet.objects.filter(id__in=[trajet.id for trajet in self.trajets]).update(places_disponibles=1)
+
+    def supprimer_par_action(self, action):
+        self.client.force_login(self.admin)
+        modifications = {t.id: Trajet.objects.get(id=t.id).date_modification for t in self.trajets}
+        versions = {t.id: version_trajet(t.id) for t in self.trajets}
+        donnees = {'action': action, '_selected_action': list(Reservation.objects.values_list('id', flat=True)[:3])}
+        if action == 'delete_selected':
+            donnees['post'] = 'yes'
+        self.client.post('/admin/core/reservation/', donnees, secure=True)
+
+        self.assertEqual(Reservation.objects.count(), 1)
+        places = sorted(Trajet.objects.filter(id__in=modifications).values_list('places_disponibles', flat=True))
+        self.assertEqual(places, [2, 3])
+        for trajet in Trajet.objects.filter(id__in=modifications):
+            self.assertGreater(trajet.date_modification, modifications[trajet.id])
+            self.assertNotEqual(version_trajet(trajet.id), versions[trajet.id])
+
+    def test_supprimer_en_masse_rend_les_places(self):
+        self.reserver()
+        self.supprimer_par_action('supprimer_en_masse')
+
+    def test_delete_selected_rend_les_places(self):
+        self.reserver()
+        self.supprimer_par_action('delete_selected')
+
+
+@skipUnless(connection.vendor == 'postgresql', "Partitionnement de StatistiqueTrajet : PostgreSQL uniquement")
+class MigrationPartitionsTests(TransactionTestCase):
+    """Migration 0011 dans les deux sens, sur des données réelles."""
+
+    AVANT = [('core', '0010_etattache_stat_index')]
+
+    def migrer(self, cibles=None):
+        executor = MigrationExecutor(connection)
+        executor.migrate(cibles or executor.loader.graph.leaf_nodes())
+        return executor.loader.project_state(cibles or executor.loader.graph.leaf_nodes()).apps
+
+    def tearDown(self):
+        self.migrer()
+
+    def etat(self):
+        table = 'core_statistiquetrajet'
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT relkind FROM pg_class WHERE relname = %s", [table])
+            relkind = cursor.fetchone()[0]
+            cursor.execute(f'SELECT COUNT(*), SUM(id) FROM "{table}"')
+            lignes = cursor.fetchone()
+            cursor.execute("SELECT indexname FROM pg_indexes WHERE tablename = %s", [table])
+            index = {ligne[0] for ligne in cursor.fetchall()}
+            cursor.execute(
+                "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+                "WHERE conrelid = %s::regclass AND contype IN ('f', 'p')",
+                [table],
+            )
+            contraintes = dict(cursor.fetchall())
+            cursor.execute(
+                "SELECT enfant.relname FROM pg_inherits "
+                "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+                "JOIN pg_class enfant ON enfant.oid = pg_inherits.inhrelid WHERE parent.relname = %s",
+                [table],
+            )
+            partitions = {ligne[0] for ligne in cursor.fetchall()}
+            cursor.execute("SELECT pg_get_serial_sequence(%s, 'id')", [table])
+            sequence = cursor.fetchone()[0]
+            cursor.execute("SELECT nextval(%s)", [sequence])
+            prochain_id = cursor.fetchone()[0]
+        return {
+            'relkind': relkind, 'lignes': lignes, 'index': index, 'contraintes': contraintes,
+            'partitions': partitions, 'sequence': sequence, 'prochain_id': prochain_id,
+        }
+
+    def test_aller_retour(self):
+        apps = self.migrer(self.AVANT)
+        Utilisateur = apps.get_model('core', 'Utilisateur')
+        StatistiqueTrajet = apps.get_model('core', 'StatistiqueTrajet')
+        chauffeur = Utilisateur.objects.create(telephone='620000005', code_unique='MIGR0011')
+        debut = datetime(2026, 3, 15, tzinfo=dt_timezone.utc)
+        StatistiqueTrajet.objects.bulk_create([
+            StatistiqueTrajet(
+                chauffeur=chauffeur, ville_depart='Conakry', ville_arrivee='Boké',
+                date_heure_depart=debut + timedelta(days=10 * i), places_totales=3,
+                places_reservees=i % 3, statut='avec_reservation',
+            )
+            for i in range(12)
+        ])
+        # Des id supprimés ne doivent pas resservir après la conversion
+        StatistiqueTrajet.objects.filter(id__in=list(
+            StatistiqueTrajet.objects.order_by('-id').values_list('id', flat=True)[:2]
+        )).delete()
+        avant = self.etat()
+        cle_etrangere = {nom for nom, definition in avant['contraintes'].items() if 'FOREIGN KEY' in definition}
+
+        self.migrer()
+        partitionnee = self.etat()
+        self.assertEqual(partitionnee['relkind'], 'p')
+        self.assertEqual(partitionnee['lignes'], avant['lignes'])
+        self.assertIn('core_statistiquetrajet_p2026_03', partitionnee['partitions'])
+        self.assertIn('core_statistiquetrajet_defaut', partitionnee['partitions'])
+        self.assertEqual(partitionnee['contraintes']['core_statistiquetrajet_pkey'],
+                         'PRIMARY KEY (id, date_heure_depart)')
+        self.assertLessEqual(cle_etrangere, set(partitionnee['contraintes']))
+        self.assertLessEqual(avant['index'], partitionnee['index'])
+        self.assertEqual(partitionnee['sequence'], avant['sequence'])
+        self.assertGreater(partitionnee['prochain_id'], avant['prochain_id'])
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT COUNT(*) FROM "core_statistiquetrajet_defaut"')
+            self.assertEqual(cursor.fetchone()[0], 0)
+
+        self.migrer(self.AVANT)
+        retour = self.etat()
+        self.assertEqual(retour['relkind'], 'r')
+        self.assertEqual(retour['lignes'], avant['lignes'])
+        self.assertEqual(retour['partitions'], set())
+        self.assertEqual(retour['index'], avant['index'])
+        self.assertEqual(retour['contraintes'], avant['contraintes'])
+        self.assertEqual(retour['sequence'], avant['sequence'])
+        self.assertGreater(retour['prochain_id'], partitionnee['prochain_id'])
@@ -8,6 +8,8 @@ urlpatterns = [
     path('trajets/publier/', views.publier_trajet, name='publier_trajet'),
     path('trajets/rechercher/', views.rechercher_trajet, name='rechercher_trajet'),
     path('trajets/<int:trajet_id>/reserver/', views.reserver_place, name='reserver_place'),
+    path('mes-reservations/', views.mes_reservations, name='mes_reservations'),
+    path('api/mes-reservations/', views.mes_reservations_json, name='mes_reservations_json'),
     path('suivre-trajet/', views.suivre_trajet, name='suivre_trajet'),
     path('modifier-trajet/<int:trajet_id>/', views.modifier_trajet, name='modifier_trajet'),
     path('deconnexion/', views.deconnexion, name='deconnexion'),
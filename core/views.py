@@ -2,10 +2,13 @@ import uuid
 from django.shortcuts import render, redirect, get_object_or_404
 from django.utils import timezone
 from django.contrib import messages
-from django.db.models import F, Q
-from django.core.mail import send_mail
+from django.db import IntegrityError, transaction
+from django.db.models import F, Prefetch, Q
 from django.conf import settings
 from django.urls import reverse
+from django.http import HttpResponse, JsonResponse
+from django.middleware.csrf import get_token
+from django.template.loader import render_to_string
 from django.shortcuts import render, redirect, get_object_or_404
 from django.utils import timezone
 from .models import Utilisateur, Trajet, StatistiqueTrajet, Reservation
@@ -17,9 +20,18 @@ from .forms import (
     CodeVerificationForm,
     TrajetForm,
     ReservationForm,
+    RechercheTrajetForm,
+    RechercheReservationsForm,
 )
+from .filtres import composer_recherche, RechercheNonIndexable
+from .archivage import RETENTION_STATISTIQUES
+from .notifications import notifier_reservation
+from .coalescence import calcul_unique, invalider_trajet, version_trajet
+from .fragments import cartes_trajets
+from .budget import budget_requetes
 
 # 🏠 Page d'accueil
+@budget_requetes(3)
 def accueil(request):
     ville_depart = request.GET.get('ville_depart')
     ville_arrivee = request.GET.get('ville_arrivee')
@@ -42,9 +54,13 @@ def accueil(request):
     except EmptyPage:
         trajets_page = paginator.page(paginator.num_pages)
 
-    return render(request, 'core/accueil.html', {'trajets': trajets_page})
+    return render(request, 'core/accueil.html', {
+        'trajets': trajets_page,
+        'cartes': cartes_trajets(trajets_page.object_list, 'core/fragments/carte_accueil.html'),
+    })
 
 # 👤 Inscription chauffeur
+@budget_requetes(4)
 def inscription(request):
     if request.method == 'POST':
         form = InscriptionChauffeurForm(request.POST, request.FILES)
@@ -58,6 +74,7 @@ def inscription(request):
     return render(request, 'core/inscription.html', {'form': form})
 
 # 🔐 Vérification code (vue unifiée)
+@budget_requetes(3)
 def verifier_code(request):
     # ✅ Si la session est déjà active, on redirige directement
     if request.session.get('conducteur_id'):
@@ -90,6 +107,7 @@ def verifier_code(request):
         return render(request, 'core/verifier_code.html', {'next': next_page})
 
 # 🚗 Publication de trajet
+@budget_requetes(3)
 def publier_trajet(request):
     conducteur_id = request.session.get('conducteur_id')
     
@@ -115,8 +133,46 @@ def publier_trajet(request):
     return render(request, 'core/publier_trajet.html', {'form': form})
 
 # 📅 Réservation de place
+JETON_CSRF = 'jeton-csrf-a-remplacer'
+
+
+def page_reservation_partagee(request, trajet_id):
+    """
+    Rendu du formulaire vierge, partagé entre les GET concurrents d'un même
+    trajet. Le jeton CSRF propre à chaque visiteur est injecté après coup.
+    Retourne None si le trajet est complet.
+    """
+    connecte = bool(request.session.get('conducteur_id'))
+    cle = f'reserver_place:{trajet_id}:{version_trajet(trajet_id)}:{int(connecte)}'
+
+    def calculer():
+        trajet = get_object_or_404(Trajet, id=trajet_id)
+        if trajet.places_disponibles <= 0:
+            return {'complet': True}
+        html = render_to_string('core/reserver_place.html', {
+            'form': ReservationForm(),
+            'trajet': trajet,
+            'csrf_token': JETON_CSRF,
+        }, request=request)
+        return {'complet': False, 'html': html}
+
+    page = calcul_unique(cle, calculer, settings.RESERVATION_CACHE_TTL)
+    if page['complet']:
+        return None
+    return HttpResponse(page['html'].replace(JETON_CSRF, get_token(request)))
+
+
+@budget_requetes(6)
 def reserver_place(request, trajet_id):
-    trajet = get_object_or_404(Trajet, id=trajet_id)
+    # GET sans message en attente : page partagée entre requêtes concurrentes
+    if request.method != 'POST' and not len(messages.get_messages(request)):
+        reponse = page_reservation_partagee(request, trajet_id)
+        if reponse is None:
+            messages.error(request, "❌ Ce trajet est déjà complet.")
+            return redirect('accueil')
+        return reponse
+
+    trajet = get_object_or_404(Trajet.objects.select_related('conducteur'), id=trajet_id)
     if trajet.places_disponibles <= 0:
         messages.error(request, "❌ Ce trajet est déjà complet.")
         return redirect('accueil')
@@ -126,21 +182,27 @@ def reserver_place(request, trajet_id):
         if form.is_valid():
             reservation = form.save(commit=False)
             reservation.trajet = trajet
-            reservation.save()
-            Trajet.objects.filter(id=trajet.id).update(places_disponibles=F('places_disponibles') - 1)
-
-            if trajet.conducteur.email:
-                send_mail(
-                    subject="🚗 Nouvelle réservation sur votre trajet",
-                    message=(
-                        f"Bonjour,\n\nUne nouvelle réservation a été effectuée pour votre trajet :\n"
-                        f"{trajet.ville_depart} ➜ {trajet.ville_arrivee} à {trajet.date_heure_depart}.\n"
-                        f"Numéro du passager : {reservation.telephone}\n\nMerci."
-                    ),
-                    from_email=settings.DEFAULT_FROM_EMAIL,
-                    recipient_list=[trajet.conducteur.email],
-                    fail_silently=True,
-                )
+            try:
+                with transaction.atomic():
+                    # Décrément conditionnel : 0 ligne mise à jour = plus de place
+                    place_prise = Trajet.objects.filter(id=trajet.id, places_disponibles__gt=0).update(
+                        places_disponibles=F('places_disponibles') - 1,
+                        date_modification=timezone.now(),
+                    )
+                    if place_prise:
+                        reservation.save()
+            except IntegrityError:
+                # Seule la contrainte resa_unique_telephone_trajet est attendue ici
+                if not Reservation.objects.filter(trajet_id=trajet.id, telephone=reservation.telephone).exists():
+                    raise
+                messages.warning(request, "Vous avez déjà une réservation sur ce trajet avec ce numéro.")
+                return redirect(f'{reverse("mes_reservations")}?telephone={reservation.telephone}')
+            if not place_prise:
+                messages.error(request, "❌ Ce trajet est déjà complet.")
+                return redirect('accueil')
+            invalider_trajet(trajet.id)
+
+            notifier_reservation(reservation, trajet.conducteur, timezone.now())
 
             date_depart_str = date_format(trajet.date_heure_depart, 'd/m/Y H:i')
 
@@ -157,16 +219,65 @@ def reserver_place(request, trajet_id):
 
     return render(request, 'core/reserver_place.html', {'form': form, 'trajet': trajet})
 
+# 🎫 Réservations d'un passager
+def reservations_a_venir(telephone):
+    return (
+        Reservation.objects.filter(telephone=telephone, trajet__date_heure_depart__gte=timezone.now())
+        .select_related('trajet')
+        .order_by('trajet__date_heure_depart')
+    )
+
+
+@budget_requetes(2)
+def mes_reservations(request):
+    form = RechercheReservationsForm(request.GET or None)
+    reservations = None
+    if form.is_valid():
+        reservations = reservations_a_venir(form.cleaned_data['telephone'])
+
+    return render(request, 'core/mes_reservations.html', {'form': form, 'reservations': reservations})
+
+
+@budget_requetes(2)
+def mes_reservations_json(request):
+    form = RechercheReservationsForm(request.GET)
+    if not form.is_valid():
+        return JsonResponse({'erreurs': form.errors}, status=400)
+
+    return JsonResponse({
+        'telephone': form.cleaned_data['telephone'],
+        'reservations': [
+            {
+                'id': reservation.id,
+                'nom': reservation.nom,
+                'date_reservation': reservation.date_reservation,
+                'trajet': {
+                    'id': reservation.trajet.id,
+                    'ville_depart': reservation.trajet.ville_depart,
+                    'ville_arrivee': reservation.trajet.ville_arrivee,
+                    'date_heure_depart': reservation.trajet.date_heure_depart,
+                    'prix': reservation.trajet.prix,
+                    'type_vehicule': reservation.trajet.type_vehicule,
+                },
+            }
+            for reservation in reservations_a_venir(form.cleaned_data['telephone'])
+        ],
+    })
+
 # 🔍 Recherche de trajets
+@budget_requetes(3)
 def rechercher_trajet(request):
-    ville_depart = request.GET.get('ville_depart')
-    ville_arrivee = request.GET.get('ville_arrivee')
+    form = RechercheTrajetForm(request.GET or None)
+    trajets = Trajet.objects.none()
 
-    trajets = Trajet.objects.all()
-    if ville_depart:
-        trajets = trajets.filter(ville_depart__icontains=ville_depart)
-    if ville_arrivee:
-        trajets = trajets.filter(ville_arrivee__icontains=ville_arrivee)
+    if form.is_bound and not form.is_valid():
+        messages.error(request, "Veuillez corriger les critères de recherche.")
+    else:
+        criteres = form.cleaned_data if form.is_bound else {}
+        try:
+            trajets = composer_recherche(criteres, timezone.now())
+        except RechercheNonIndexable as erreur:
+            messages.error(request, str(erreur))
 
     paginator = Paginator(trajets, 12)
     page = request.GET.get('page')
@@ -178,10 +289,15 @@ def rechercher_trajet(request):
     except EmptyPage:
         trajets_page = paginator.page(paginator.num_pages)
 
-    return render(request, 'core/rechercher_trajet.html', {'trajets': trajets_page})
+    return render(request, 'core/rechercher_trajet.html', {
+        'trajets': trajets_page,
+        'cartes': cartes_trajets(trajets_page.object_list, 'core/fragments/carte_recherche.html'),
+        'form': form,
+    })
 
 
 # 📍 Suivi de trajet
+@budget_requetes(8)
 def suivre_trajet(request):
     conducteur_id = request.session.get('conducteur_id')
 
@@ -208,6 +324,7 @@ def suivre_trajet(request):
             messages.error(request, "❌ Impossible de supprimer un trajet avec des réservations.")
         else:
             trajet.delete()
+            invalider_trajet(trajet_id)
             messages.success(request, "✅ Trajet supprimé avec succès.")
 
         return redirect('suivre_trajet')
@@ -215,8 +332,11 @@ def suivre_trajet(request):
     # Trajets actifs (à venir)
     trajets_actifs = Trajet.objects.filter(conducteur=conducteur, date_heure_depart__gte=maintenant)
 
-    # Trajets archivés
-    trajets_archives = StatistiqueTrajet.objects.filter(chauffeur=conducteur)
+    # Trajets archivés (bornés à la rétention : seules les partitions récentes sont lues)
+    trajets_archives = StatistiqueTrajet.objects.filter(
+        chauffeur=conducteur,
+        date_heure_depart__gte=maintenant - RETENTION_STATISTIQUES,
+    )
 
     # Réservations globales
     reservations_totales = Reservation.objects.filter(trajet__conducteur=conducteur).count()
@@ -227,9 +347,12 @@ def suivre_trajet(request):
 
     # Construction des détails par trajet
     trajets_avec_details = []
-    for trajet in trajets_actifs.order_by('-date_heure_depart'):
-        reservations = trajet.reservations.all().order_by('date_reservation')
-        places_reservees = reservations.count()
+    trajets_actifs = trajets_actifs.order_by('-date_heure_depart').prefetch_related(
+        Prefetch('reservations', queryset=Reservation.objects.order_by('date_reservation'))
+    )
+    for trajet in trajets_actifs:
+        reservations = trajet.reservations.all()
+        places_reservees = len(reservations)
         places_restantes = trajet.places_disponibles
         modifiable = (places_reservees == 0)
 
@@ -245,7 +368,7 @@ def suivre_trajet(request):
     # Données envoyées au template
     context = {
         'conducteur': conducteur,
-        'trajets_actifs_count': trajets_actifs.count(),
+        'trajets_actifs_count': len(trajets_avec_details),
         'trajets_archives_count': trajets_archives.count(),
         'reservations_totales': reservations_totales,
         'trajets_avec_reservations': trajets_avec_reservations,
@@ -255,13 +378,18 @@ def suivre_trajet(request):
     return render(request, 'core/suivre_trajet.html', context)
 
 # ✏️ Modifier un trajet existant
+@budget_requetes(4)
 def modifier_trajet(request, trajet_id):
     trajet = get_object_or_404(Trajet, id=trajet_id)
 
     if request.method == 'POST':
         form = TrajetForm(request.POST, instance=trajet)
         if form.is_valid():
-            form.save()
+            trajet = form.save(commit=False)
+            # Le total suit les places saisies, réservations existantes comprises
+            trajet.places_totales = trajet.places_disponibles + trajet.reservations.count()
+            trajet.save()
+            invalider_trajet(trajet.id)
             return redirect('suivre_trajet')
     else:
         form = TrajetForm(instance=trajet)
@@ -269,6 +397,7 @@ def modifier_trajet(request, trajet_id):
     return render(request, 'core/modifier_trajet.html', {'form': form, 'trajet': trajet})
 
 # 🚪 Déconnexion
+@budget_requetes(3)
 def deconnexion(request):
     request.session.flush()
     return redirect('accueil')
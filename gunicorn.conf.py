@@ -0,0 +1,73 @@
+# Configuration gunicorn de production : gunicorn -c gunicorn.conf.py
+# (chargée automatiquement si gunicorn est lancé depuis ce répertoire)
+import multiprocessing
+import os
+
+wsgi_app = 'angnewa.wsgi:application'
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+
+# Django est importé une fois dans le maître puis partagé au fork
+preload_app = True
+
+# gthread : des threads par worker pour absorber les attentes base de données / SMTP
+worker_class = 'gthread'
+workers = int(os.environ.get('GUNICORN_WORKERS', multiprocessing.cpu_count() + 1))
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+graceful_timeout = 30
+keepalive = 5
+
+# Recyclage des workers, décalé pour qu'ils ne redémarrent pas tous ensemble
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 1000))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 100))
+
+accesslog = '-'
+errorlog = '-'
+
+PRECHAUFFAGE = os.environ.get('GUNICORN_PRECHAUFFAGE', '1') != '0'
+
+
+def when_ready(server):
+    if not PRECHAUFFAGE:
+        return
+    from angnewa.prechauffage import prechauffer_maitre
+
+    urls, gabarits = prechauffer_maitre()
+    server.log.info("Préchauffage : %d routes, %d gabarits compilés", urls, gabarits)
+
+
+def post_worker_init(worker):
+    if PRECHAUFFAGE:
+        from angnewa.prechauffage import prechauffer_worker
+
+        ouvertes = prechauffer_worker(getattr(worker, 'tpool', None), worker.cfg.threads)
+        worker.log.info("Préchauffage : connexions ouvertes pour %d threads", ouvertes)
+
+    # Archivage continu dans les workers : le verrou EtatTache n'en laisse travailler qu'un
+    if os.environ.get('ARCHIVAGE_EN_CONTINU') == '1':
+        from core.archivage import lancer_en_arriere_plan
+
+        worker.archivage = lancer_en_arriere_plan()
+
+    # Résumés de réservations (NOTIFICATIONS_RESUME) : même principe, verrou TACHE_RESUMES
+    from django.conf import settings
+
+    if settings.NOTIFICATIONS_RESUME:
+        from core.notifications import lancer_resumes_en_arriere_plan
+
+        worker.resumes = lancer_resumes_en_arriere_plan()
+
+
+def worker_exit(server, worker):
+    # Worker recyclé ou arrêté : il rend ses verrous (archivage, résumés) à un autre worker
+    archivage = getattr(worker, 'archivage', None)
+    if archivage is not None:
+        from core.archivage import arreter_en_arriere_plan
+
+        arreter_en_arriere_plan(*archivage)
+
+    resumes = getattr(worker, 'resumes', None)
+    if resumes is not None:
+        from core.notifications import arreter_resumes_en_arriere_plan
+
+        arreter_resumes_en_arriere_plan(*resumes)